@@ -840,23 +840,27 @@ def build_imscc(template_dir, output_file=None):
     if files_dir.exists():
         print(f"\n📎 Processing files from {files_dir.name}/...")
         
-        # Get all files recursively
+        # Get all files recursively as (relative path, source path) pairs.
+        # Path prefixes are built once per directory, not once per file.
         all_files = []
         for root, dirs, files in os.walk(files_dir):
+            rel_root = os.path.relpath(root, files_dir)
+            rel_prefix = '' if rel_root == os.curdir else rel_root + os.sep
+            src_prefix = root + os.sep
             for file in files:
                 if not file.startswith('.'):  # Skip hidden files
-                    filepath = Path(root) / file
-                    all_files.append(filepath)
+                    all_files.append((rel_prefix + file, src_prefix + file))
         
         if not all_files:
             print(f"   ℹ️  No files found in {files_dir}")
         
-        for filepath in sorted(all_files):
-            # Calculate relative path from web_resources
-            rel_path = filepath.relative_to(files_dir)
+        # Sort by path components, as sorting Path objects did
+        all_files.sort(key=lambda pair: pair[0].split(os.sep))
+        
+        for rel_path, filepath in all_files:
             destination = f"web_resources/{rel_path}"
             
-            course.add_file(str(filepath), destination)
+            course.add_file(filepath, destination)
             print(f"   ✓ {rel_path}")
     
     # Process rubrics
@@ -2,9 +2,73 @@
 
 from typing import Optional, List, Dict, Any
 from datetime import datetime
-from xml.etree.ElementTree import Element, SubElement, tostring
-from xml.dom import minidom
-from .utils import generate_identifier, slugify
+from xml.etree.ElementTree import Element, SubElement
+from .utils import generate_identifier, escape_xml, slugify, text_element
+
+
+# assignment_settings.xml is mostly fixed markup, so it is rendered from a
+# template rather than built element by element. Elements in Canvas export
+# order.
+_ASSIGNMENT_SETTINGS_TEMPLATE = """\
+<?xml version="1.0" encoding="UTF-8"?>
+<assignment xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" xmlns="http://canvas.instructure.com/xsd/cccv1p0" xsi:schemaLocation="http://canvas.instructure.com/xsd/cccv1p0 https://canvas.instructure.com/xsd/cccv1p0.xsd" identifier="{identifier}">
+  {title}
+  {due_at}
+  {lock_at}
+  {unlock_at}
+  <module_locked>{module_locked}</module_locked>
+  {group_ref}{workflow_state}
+{rubric_refs}  <assignment_overrides/>
+  {allowed_extensions}
+  <has_group_category>{has_group_category}</has_group_category>
+  <points_possible>{points_possible}</points_possible>
+  {grading_type}
+  <all_day>{all_day}</all_day>
+  {submission_types}
+  <position>{position}</position>
+  <turnitin_enabled>{turnitin_enabled}</turnitin_enabled>
+  <vericite_enabled>{vericite_enabled}</vericite_enabled>
+  <peer_review_count>{peer_review_count}</peer_review_count>
+  <peer_reviews>{peer_reviews}</peer_reviews>
+  <automatic_peer_reviews>{automatic_peer_reviews}</automatic_peer_reviews>
+  <anonymous_peer_reviews>{anonymous_peer_reviews}</anonymous_peer_reviews>
+  <grade_group_students_individually>{grade_group_students_individually}</grade_group_students_individually>
+  <freeze_on_copy>{freeze_on_copy}</freeze_on_copy>
+  <omit_from_final_grade>{omit_from_final_grade}</omit_from_final_grade>
+  <hide_in_gradebook>{hide_in_gradebook}</hide_in_gradebook>
+  <intra_group_peer_reviews>{intra_group_peer_reviews}</intra_group_peer_reviews>
+  <only_visible_to_overrides>{only_visible_to_overrides}</only_visible_to_overrides>
+  <post_to_sis>{post_to_sis}</post_to_sis>
+  <moderated_grading>{moderated_grading}</moderated_grading>
+  <grader_count>{grader_count}</grader_count>
+  <grader_comments_visible_to_graders>{grader_comments_visible_to_graders}</grader_comments_visible_to_graders>
+  <anonymous_grading>{anonymous_grading}</anonymous_grading>
+  <graders_anonymous_to_graders>{graders_anonymous_to_graders}</graders_anonymous_to_graders>
+  <grader_names_visible_to_final_grader>{grader_names_visible_to_final_grader}</grader_names_visible_to_final_grader>
+  <anonymous_instructor_annotations>{anonymous_instructor_annotations}</anonymous_instructor_annotations>
+  <post_policy>
+    <post_manually>{post_manually}</post_manually>
+  </post_policy>
+</assignment>
+"""
+
+_RUBRIC_REFS_TEMPLATE = """\
+  <rubric_identifierref>{identifier}</rubric_identifierref>
+  <rubric_use_for_grading>{use_for_grading}</rubric_use_for_grading>
+  <rubric_hide_points>{hide_points}</rubric_hide_points>
+  <rubric_hide_outcome_results>{hide_outcome_results}</rubric_hide_outcome_results>
+  <rubric_hide_score_total>{hide_score_total}</rubric_hide_score_total>
+"""
+
+_ASSIGNMENT_HTML_TEMPLATE = """<html>
+<head>
+<meta http-equiv="Content-Type" content="text/html; charset=utf-8"/>
+<title>Assignment: {title}</title>
+</head>
+<body>
+{description}
+</body>
+</html>"""
 
 
 class Assignment:
@@ -122,89 +186,64 @@ class Assignment:
         Returns:
             Formatted XML string
         """
-        assignment = Element(
-            'assignment',
-            identifier=self.identifier,
-            xmlns="http://canvas.instructure.com/xsd/cccv1p0",
-            attrib={
-                'xmlns:xsi': "http://www.w3.org/2001/XMLSchema-instance",
-                'xsi:schemaLocation': "http://canvas.instructure.com/xsd/cccv1p0 https://canvas.instructure.com/xsd/cccv1p0.xsd"
-            }
-        )
-        
-        # Add elements in the order they appear in Canvas exports
-        SubElement(assignment, 'title').text = self.title
-        
-        # Add dates
-        SubElement(assignment, 'due_at').text = self.due_at
-        SubElement(assignment, 'lock_at').text = self.lock_at
-        SubElement(assignment, 'unlock_at').text = self.unlock_at
-        
-        SubElement(assignment, 'module_locked').text = str(self.module_locked).lower()
-        
         # Assignment group reference
         if self.assignment_group_identifierref:
-            SubElement(assignment, 'assignment_group_identifierref').text = self.assignment_group_identifierref
-        
-        SubElement(assignment, 'workflow_state').text = self.workflow_state
+            group_ref = text_element('assignment_group_identifierref',
+                                      self.assignment_group_identifierref) + '\n  '
+        else:
+            group_ref = ''
         
         # Rubric references if rubric is attached
         if self.rubric:
-            SubElement(assignment, 'rubric_identifierref').text = self.rubric.identifier
-            SubElement(assignment, 'rubric_use_for_grading').text = str(self.rubric.use_for_grading).lower()
-            SubElement(assignment, 'rubric_hide_points').text = str(self.rubric.hide_points).lower()
-            SubElement(assignment, 'rubric_hide_outcome_results').text = str(self.rubric.hide_outcome_results).lower()
-            SubElement(assignment, 'rubric_hide_score_total').text = str(self.rubric.hide_score_total).lower()
-        
-        # Assignment overrides (empty for now)
-        SubElement(assignment, 'assignment_overrides')
-        
-        # Allowed extensions for file uploads
-        SubElement(assignment, 'allowed_extensions').text = self.allowed_extensions
-        
-        SubElement(assignment, 'has_group_category').text = str(self.has_group_category).lower()
-        SubElement(assignment, 'points_possible').text = str(self.points_possible)
-        SubElement(assignment, 'grading_type').text = self.grading_type
-        SubElement(assignment, 'all_day').text = str(self.all_day).lower()
-        SubElement(assignment, 'submission_types').text = self.submission_types
-        SubElement(assignment, 'position').text = str(self.position)
-        
-        # Plagiarism detection
-        SubElement(assignment, 'turnitin_enabled').text = str(self.turnitin_enabled).lower()
-        SubElement(assignment, 'vericite_enabled').text = str(self.vericite_enabled).lower()
-        
-        # Peer reviews
-        SubElement(assignment, 'peer_review_count').text = str(self.peer_review_count)
-        SubElement(assignment, 'peer_reviews').text = str(self.peer_reviews).lower()
-        SubElement(assignment, 'automatic_peer_reviews').text = str(self.automatic_peer_reviews).lower()
-        SubElement(assignment, 'anonymous_peer_reviews').text = str(self.anonymous_peer_reviews).lower()
-        
-        # Other settings
-        SubElement(assignment, 'grade_group_students_individually').text = str(self.grade_group_students_individually).lower()
-        SubElement(assignment, 'freeze_on_copy').text = str(self.freeze_on_copy).lower()
-        SubElement(assignment, 'omit_from_final_grade').text = str(self.omit_from_final_grade).lower()
-        SubElement(assignment, 'hide_in_gradebook').text = str(self.hide_in_gradebook).lower()
-        SubElement(assignment, 'intra_group_peer_reviews').text = str(self.intra_group_peer_reviews).lower()
-        SubElement(assignment, 'only_visible_to_overrides').text = str(self.only_visible_to_overrides).lower()
-        SubElement(assignment, 'post_to_sis').text = str(self.post_to_sis).lower()
-        
-        # Moderated grading
-        SubElement(assignment, 'moderated_grading').text = str(self.moderated_grading).lower()
-        SubElement(assignment, 'grader_count').text = str(self.grader_count)
-        SubElement(assignment, 'grader_comments_visible_to_graders').text = str(self.grader_comments_visible_to_graders).lower()
-        SubElement(assignment, 'anonymous_grading').text = str(self.anonymous_grading).lower()
-        SubElement(assignment, 'graders_anonymous_to_graders').text = str(self.graders_anonymous_to_graders).lower()
-        SubElement(assignment, 'grader_names_visible_to_final_grader').text = str(self.grader_names_visible_to_final_grader).lower()
-        SubElement(assignment, 'anonymous_instructor_annotations').text = str(self.anonymous_instructor_annotations).lower()
-        
-        # Post policy
-        post_policy = SubElement(assignment, 'post_policy')
-        SubElement(post_policy, 'post_manually').text = str(self.post_manually).lower()
+            rubric_refs = _RUBRIC_REFS_TEMPLATE.format(
+                identifier=escape_xml(self.rubric.identifier),
+                use_for_grading=str(self.rubric.use_for_grading).lower(),
+                hide_points=str(self.rubric.hide_points).lower(),
+                hide_outcome_results=str(self.rubric.hide_outcome_results).lower(),
+                hide_score_total=str(self.rubric.hide_score_total).lower(),
+            )
+        else:
+            rubric_refs = ''
         
-        # Convert to formatted string
-        rough_string = tostring(assignment, encoding='unicode')
-        reparsed = minidom.parseString(rough_string)
-        return reparsed.toprettyxml(indent="  ", encoding='UTF-8').decode('utf-8')
+        return _ASSIGNMENT_SETTINGS_TEMPLATE.format(
+            identifier=escape_xml(self.identifier),
+            title=text_element('title', self.title),
+            due_at=text_element('due_at', self.due_at),
+            lock_at=text_element('lock_at', self.lock_at),
+            unlock_at=text_element('unlock_at', self.unlock_at),
+            module_locked=str(self.module_locked).lower(),
+            group_ref=group_ref,
+            workflow_state=text_element('workflow_state', self.workflow_state),
+            rubric_refs=rubric_refs,
+            allowed_extensions=text_element('allowed_extensions', self.allowed_extensions),
+            has_group_category=str(self.has_group_category).lower(),
+            points_possible=self.points_possible,
+            grading_type=text_element('grading_type', self.grading_type),
+            all_day=str(self.all_day).lower(),
+            submission_types=text_element('submission_types', self.submission_types),
+            position=self.position,
+            turnitin_enabled=str(self.turnitin_enabled).lower(),
+            vericite_enabled=str(self.vericite_enabled).lower(),
+            peer_review_count=self.peer_review_count,
+            peer_reviews=str(self.peer_reviews).lower(),
+            automatic_peer_reviews=str(self.automatic_peer_reviews).lower(),
+            anonymous_peer_reviews=str(self.anonymous_peer_reviews).lower(),
+            grade_group_students_individually=str(self.grade_group_students_individually).lower(),
+            freeze_on_copy=str(self.freeze_on_copy).lower(),
+            omit_from_final_grade=str(self.omit_from_final_grade).lower(),
+            hide_in_gradebook=str(self.hide_in_gradebook).lower(),
+            intra_group_peer_reviews=str(self.intra_group_peer_reviews).lower(),
+            only_visible_to_overrides=str(self.only_visible_to_overrides).lower(),
+            post_to_sis=str(self.post_to_sis).lower(),
+            moderated_grading=str(self.moderated_grading).lower(),
+            grader_count=self.grader_count,
+            grader_comments_visible_to_graders=str(self.grader_comments_visible_to_graders).lower(),
+            anonymous_grading=str(self.anonymous_grading).lower(),
+            graders_anonymous_to_graders=str(self.graders_anonymous_to_graders).lower(),
+            grader_names_visible_to_final_grader=str(self.grader_names_visible_to_final_grader).lower(),
+            anonymous_instructor_annotations=str(self.anonymous_instructor_annotations).lower(),
+            post_manually=str(self.post_manually).lower(),
+        )
     
     def get_html_content(self) -> str:
         """
@@ -213,15 +252,7 @@ class Assignment:
         Returns:
             HTML string
         """
-        return f"""<html>
-<head>
-<meta http-equiv="Content-Type" content="text/html; charset=utf-8"/>
-<title>Assignment: {self.title}</title>
-</head>
-<body>
-{self.description}
-</body>
-</html>"""
+        return _ASSIGNMENT_HTML_TEMPLATE.format(title=self.title, description=self.description)
 
 
 class AssignmentGroup:
@@ -248,9 +279,20 @@ class AssignmentGroup:
         self.group_weight = group_weight
         self.identifier = identifier or generate_identifier()
     
-    def to_xml(self) -> Element:
-        """Generate XML element for assignment group."""
-        group = Element('assignmentGroup', identifier=self.identifier)
+    def to_xml(self, parent: Optional[Element] = None) -> Element:
+        """
+        Generate XML element for assignment group.
+        
+        Args:
+            parent: Optional element to create the group under
+        
+        Returns:
+            The assignmentGroup element
+        """
+        if parent is None:
+            group = Element('assignmentGroup', identifier=self.identifier)
+        else:
+            group = SubElement(parent, 'assignmentGroup', identifier=self.identifier)
         SubElement(group, 'title').text = self.title
         SubElement(group, 'position').text = str(self.position)
         SubElement(group, 'group_weight').text = str(self.group_weight)
@@ -346,9 +388,20 @@ class Rubric:
         self.points_possible = sum(c.get('points', 0) for c in self.criteria)
         return self
     
-    def to_xml(self) -> Element:
-        """Generate XML element for rubric."""
-        rubric = Element('rubric', identifier=self.identifier)
+    def to_xml(self, parent: Optional[Element] = None) -> Element:
+        """
+        Generate XML element for rubric.
+        
+        Args:
+            parent: Optional element to create the rubric under
+        
+        Returns:
+            The rubric element
+        """
+        if parent is None:
+            rubric = Element('rubric', identifier=self.identifier)
+        else:
+            rubric = SubElement(parent, 'rubric', identifier=self.identifier)
         
         SubElement(rubric, 'read_only').text = str(self.read_only).lower()
         SubElement(rubric, 'title').text = self.title
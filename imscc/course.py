@@ -1,19 +1,183 @@
 """Course class for creating IMSCC packages."""
 
+import io
 import os
+import queue
+import threading
+import time
 import zipfile
-import tempfile
-import shutil
-from datetime import datetime
-from pathlib import Path
-from typing import Optional, List
-from xml.etree.ElementTree import Element, SubElement, tostring
-from xml.dom import minidom
+from datetime import date
+from typing import Any, Iterator, List, Optional, Tuple
+from xml.etree.ElementTree import Element, SubElement
 
+from .assignment import AssignmentGroup
 from .wiki_page import WikiPage
 from .module import Module
 from .resource import FileResource, FileManager
-from .utils import generate_identifier, ensure_dir
+from .utils import generate_identifier, ensure_dir, escape_xml, to_pretty_xml, write_pretty_xml
+
+
+# Only a handful of course settings vary, so the document is rendered from a
+# template instead of being built element by element. The identifier comes
+# first on the course tag to match Canvas.
+_COURSE_SETTINGS_TEMPLATE = """\
+<?xml version="1.0" encoding="UTF-8"?>
+<course identifier="{identifier}" xmlns="http://canvas.instructure.com/xsd/cccv1p0" xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" xsi:schemaLocation="http://canvas.instructure.com/xsd/cccv1p0 https://canvas.instructure.com/xsd/cccv1p0.xsd">
+  <title>{title}</title>
+  <course_code>{course_code}</course_code>
+  <start_at/>
+  <conclude_at/>
+  <is_public>false</is_public>
+  <is_public_to_auth_users>false</is_public_to_auth_users>
+  <allow_student_wiki_edits>false</allow_student_wiki_edits>
+  <allow_student_forum_attachments>false</allow_student_forum_attachments>
+  <lock_all_announcements>false</lock_all_announcements>
+  <default_wiki_editing_roles>teachers</default_wiki_editing_roles>
+  <allow_student_organized_groups>false</allow_student_organized_groups>
+  <default_view>{default_view}</default_view>
+  <open_enrollment>false</open_enrollment>
+  <filter_speed_grader_by_student_group>true</filter_speed_grader_by_student_group>
+  <self_enrollment>false</self_enrollment>
+  <license>{license}</license>
+  <indexed>false</indexed>
+  <hide_final_grade>false</hide_final_grade>
+  <hide_distribution_graphs>false</hide_distribution_graphs>
+  <allow_student_discussion_topics>false</allow_student_discussion_topics>
+  <allow_student_discussion_editing>false</allow_student_discussion_editing>
+  <show_announcements_on_home_page>false</show_announcements_on_home_page>
+  <home_page_announcement_limit>3</home_page_announcement_limit>
+  <usage_rights_required>false</usage_rights_required>
+  <restrict_student_future_view>true</restrict_student_future_view>
+  <restrict_student_past_view>false</restrict_student_past_view>
+  <restrict_enrollments_to_course_dates>false</restrict_enrollments_to_course_dates>
+  <homeroom_course>false</homeroom_course>
+  <horizon_course>false</horizon_course>
+  <conditional_release>false</conditional_release>
+  <content_library>false</content_library>
+  <grading_standard_enabled>false</grading_standard_enabled>
+  <storage_quota>5000000000</storage_quota>
+  <overridden_course_visibility/>
+  <root_account_uuid>{root_account_uuid}</root_account_uuid>
+  <default_post_policy>
+    <post_manually>false</post_manually>
+  </default_post_policy>
+  <enable_course_paces>false</enable_course_paces>
+</course>
+"""
+
+_CONTEXT_TEMPLATE = """\
+<?xml version="1.0" encoding="UTF-8"?>
+<context_info xmlns="http://canvas.instructure.com/xsd/cccv1p0" xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" xsi:schemaLocation="http://canvas.instructure.com/xsd/cccv1p0 https://canvas.instructure.com/xsd/cccv1p0.xsd">
+  <course_name>{title}</course_name>
+</context_info>
+"""
+
+_MEDIA_TRACKS_XML = (
+    b'<?xml version="1.0" encoding="UTF-8"?>\n'
+    b'<media_tracks xmlns="http://canvas.instructure.com/xsd/cccv1p0" xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" xsi:schemaLocation="http://canvas.instructure.com/xsd/cccv1p0 https://canvas.instructure.com/xsd/cccv1p0.xsd"/>\n'
+)
+
+# Canvas includes a joke in this file
+_CANVAS_EXPORT_TXT = (
+    b'Q: What did the canvas say to the students?\n'
+    b"A: I've got you covered!"
+)
+
+# module_meta.xml fragments, rendered once per module and module item
+_MODULE_TEMPLATE = """\
+  <module identifier="{identifier}">
+    <title>{title}</title>
+    <workflow_state>{workflow_state}</workflow_state>
+    <position>{position}</position>
+    <require_sequential_progress>{require_sequential_progress}</require_sequential_progress>
+    <locked>{locked}</locked>
+"""
+
+_MODULE_ITEM_TEMPLATE = """\
+      <item identifier="{identifier}">
+        <content_type>{content_type}</content_type>
+        <workflow_state>{workflow_state}</workflow_state>
+        <title>{title}</title>
+        <identifierref>{identifierref}</identifierref>
+        <position>{position}</position>
+        <new_tab/>
+        <indent>{indent}</indent>
+        <link_settings_json>null</link_settings_json>
+      </item>
+"""
+
+
+# Packages whose course files total less than this are built in memory
+_IN_MEMORY_EXPORT_LIMIT = 64 * 1024 * 1024
+
+# Generated documents smaller than this are stored uncompressed; deflate
+# saves only a few hundred bytes on them
+_MIN_DEFLATE_SIZE = 1024
+
+
+def _writestr(zipf: zipfile.ZipFile, arcname: str, data) -> None:
+    """Add a generated document to the package, deflating it only if it is large enough."""
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+    zinfo = zipfile.ZipInfo(arcname, date_time=time.localtime()[:6])
+    zinfo.external_attr = 0o600 << 16  # same mode ZipFile.writestr gives a name
+    if len(data) < _MIN_DEFLATE_SIZE:
+        zinfo.compress_type = zipfile.ZIP_STORED
+    else:
+        zinfo.compress_type = zipf.compression
+    zipf.writestr(zinfo, data)
+
+
+# Rendered documents waiting for the zip writer. One is enough to keep the
+# producer busy while the writer deflates, and it bounds export memory to
+# three documents: the one being written, one queued, and one being built.
+_PIPELINE_DEPTH = 1
+
+_PIPELINE_DONE = object()
+
+
+def _pipelined(entries: Iterator[Tuple[str, Any]]) -> Iterator[Tuple[str, Any]]:
+    """
+    Render entries on a background thread while the caller writes them.
+    
+    zlib releases the GIL while deflating, so building the next document
+    overlaps with compressing the current one. Only the calling thread
+    touches the ZipFile. Exceptions raised while rendering are re-raised
+    in the caller.
+    """
+    pending: queue.Queue = queue.Queue(maxsize=_PIPELINE_DEPTH)
+    stopped = threading.Event()
+    
+    def produce() -> None:
+        try:
+            for entry in entries:
+                pending.put(entry)
+                if stopped.is_set():
+                    return
+            pending.put(_PIPELINE_DONE)
+        except BaseException as exc:
+            pending.put(exc)
+    
+    producer = threading.Thread(target=produce, name='imscc-render', daemon=True)
+    producer.start()
+    try:
+        while True:
+            entry = pending.get()
+            if entry is _PIPELINE_DONE:
+                break
+            if isinstance(entry, BaseException):
+                raise entry
+            yield entry
+            del entry
+    finally:
+        # Unblock a producer stuck on a full queue if the writer gave up early
+        stopped.set()
+        while producer.is_alive():
+            try:
+                pending.get(timeout=0.1)
+            except queue.Empty:
+                pass
+        producer.join()
 
 
 class Course:
@@ -168,8 +332,6 @@ class Course:
         Returns:
             The created AssignmentGroup
         """
-        from .assignment import AssignmentGroup
-        
         if position is None:
             position = len(self.assignment_groups) + 1
         
@@ -233,8 +395,8 @@ class Course:
         
         self.quizzes.append(quiz)
     
-    def _generate_manifest(self) -> str:
-        """Generate the imsmanifest.xml content."""
+    def _build_manifest(self) -> Element:
+        """Build the imsmanifest.xml element tree."""
         # Root manifest element - attribute order matters for Canvas!
         manifest = Element('manifest')
         # Set attributes in the same order as Canvas exports
@@ -264,7 +426,7 @@ class Course:
         lifecycle = SubElement(lom, 'lomimscc:lifeCycle')
         contribute = SubElement(lifecycle, 'lomimscc:contribute')
         date_elem = SubElement(contribute, 'lomimscc:date')
-        SubElement(date_elem, 'lomimscc:dateTime').text = datetime.now().strftime('%Y-%m-%d')
+        SubElement(date_elem, 'lomimscc:dateTime').text = date.today().isoformat()
         
         rights = SubElement(lom, 'lomimscc:rights')
         copyright_elem = SubElement(rights, 'lomimscc:copyrightAndOtherRestrictions')
@@ -280,224 +442,150 @@ class Course:
         
         learning_modules = SubElement(organization, 'item')
         learning_modules.set('identifier', 'LearningModules')
+        if not self.modules:
+            # Canvas expects <item identifier="LearningModules"></item> not <item ... />
+            learning_modules.text = '\n      '
         
         # Add modules to organization
         for module in self.modules:
-            module_item = SubElement(learning_modules, 'item')
-            module_item.set('identifier', module.identifier)
-            title_elem = SubElement(module_item, 'title')
-            title_elem.text = module.title
+            module_item = SubElement(learning_modules, 'item', identifier=module.identifier)
+            SubElement(module_item, 'title').text = module.title
             
             # Add module items
             for item in module.items:
-                item_elem = SubElement(module_item, 'item')
-                item_elem.set('identifier', item.identifier)
-                item_elem.set('identifierref', item.identifierref)
-                item_title = SubElement(item_elem, 'title')
-                item_title.text = item.title
+                item_elem = SubElement(module_item, 'item', identifier=item.identifier,
+                                       identifierref=item.identifierref)
+                SubElement(item_elem, 'title').text = item.title
         
         # Resources
         resources = SubElement(manifest, 'resources')
         
-        # Course settings resource
-        settings_id = generate_identifier()
-        settings_resource = SubElement(resources, 'resource')
-        settings_resource.set('identifier', settings_id)
-        settings_resource.set('type', 'associatedcontent/imscc_xmlv1p1/learning-application-resource')
-        settings_resource.set('href', 'course_settings/canvas_export.txt')
-        
-        SubElement(settings_resource, 'file').set('href', 'course_settings/course_settings.xml')
-        SubElement(settings_resource, 'file').set('href', 'course_settings/files_meta.xml')
-        SubElement(settings_resource, 'file').set('href', 'course_settings/context.xml')
-        SubElement(settings_resource, 'file').set('href', 'course_settings/media_tracks.xml')
-        SubElement(settings_resource, 'file').set('href', 'course_settings/canvas_export.txt')
-        
+        # Course settings resource. canvas_export.txt is both the resource
+        # href and one of its files: IMS CP lists every file of a resource,
+        # including the one it points to, and Canvas exports do the same.
+        settings_files = [
+            'course_settings/course_settings.xml',
+            'course_settings/files_meta.xml',
+            'course_settings/context.xml',
+            'course_settings/media_tracks.xml',
+            'course_settings/canvas_export.txt',
+        ]
         if self.modules:
-            SubElement(settings_resource, 'file').set('href', 'course_settings/module_meta.xml')
-        
+            settings_files.append('course_settings/module_meta.xml')
         if self.assignment_groups:
-            SubElement(settings_resource, 'file').set('href', 'course_settings/assignment_groups.xml')
-        
+            settings_files.append('course_settings/assignment_groups.xml')
         if self.rubrics:
-            SubElement(settings_resource, 'file').set('href', 'course_settings/rubrics.xml')
+            settings_files.append('course_settings/rubrics.xml')
+        
+        settings_resource = SubElement(
+            resources, 'resource',
+            identifier=generate_identifier(),
+            type='associatedcontent/imscc_xmlv1p1/learning-application-resource',
+            href='course_settings/canvas_export.txt'
+        )
+        for href in settings_files:
+            SubElement(settings_resource, 'file', href=href)
         
         # Wiki page resources
         for page in self.pages:
-            resource = SubElement(resources, 'resource')
-            resource.set('identifier', page.identifier)
-            resource.set('type', 'webcontent')
-            resource.set('href', f'wiki_content/{page.filename}')
-            SubElement(resource, 'file').set('href', f'wiki_content/{page.filename}')
+            href = f'wiki_content/{page.filename}'
+            resource = SubElement(resources, 'resource', identifier=page.identifier,
+                                  type='webcontent', href=href)
+            SubElement(resource, 'file', href=href)
         
         # Assignment resources
         for assignment in self.assignments:
-            resource = SubElement(resources, 'resource')
-            resource.set('identifier', assignment.identifier)
-            resource.set('type', 'associatedcontent/imscc_xmlv1p1/learning-application-resource')
-            resource.set('href', f'{assignment.identifier}/assignment.html')
-            SubElement(resource, 'file').set('href', f'{assignment.identifier}/assignment.html')
-            SubElement(resource, 'file').set('href', f'{assignment.identifier}/assignment_settings.xml')
+            href = f'{assignment.identifier}/assignment.html'
+            resource = SubElement(
+                resources, 'resource',
+                identifier=assignment.identifier,
+                type='associatedcontent/imscc_xmlv1p1/learning-application-resource',
+                href=href
+            )
+            SubElement(resource, 'file', href=href)
+            SubElement(resource, 'file', href=f'{assignment.identifier}/assignment_settings.xml')
         
         # Quiz resources
         for quiz in self.quizzes:
             # Main quiz resource
-            quiz_resource = SubElement(resources, 'resource')
-            quiz_resource.set('identifier', quiz.identifier)
-            quiz_resource.set('type', 'imsqti_xmlv1p2/imscc_xmlv1p1/assessment')
-            SubElement(quiz_resource, 'file').set('href', f'{quiz.identifier}/assessment_qti.xml')
+            quiz_resource = SubElement(resources, 'resource', identifier=quiz.identifier,
+                                       type='imsqti_xmlv1p2/imscc_xmlv1p1/assessment')
+            SubElement(quiz_resource, 'file', href=f'{quiz.identifier}/assessment_qti.xml')
             
             # Dependency resource
             dep_id = generate_identifier('i')
             SubElement(quiz_resource, 'dependency', identifierref=dep_id)
             
             # Associated content resource
-            dep_resource = SubElement(resources, 'resource')
-            dep_resource.set('identifier', dep_id)
-            dep_resource.set('type', 'associatedcontent/imscc_xmlv1p1/learning-application-resource')
-            dep_resource.set('href', f'{quiz.identifier}/assessment_meta.xml')
-            SubElement(dep_resource, 'file').set('href', f'{quiz.identifier}/assessment_meta.xml')
-            SubElement(dep_resource, 'file').set('href', f'non_cc_assessments/{quiz.identifier}.xml.qti')
+            meta_href = f'{quiz.identifier}/assessment_meta.xml'
+            dep_resource = SubElement(
+                resources, 'resource',
+                identifier=dep_id,
+                type='associatedcontent/imscc_xmlv1p1/learning-application-resource',
+                href=meta_href
+            )
+            SubElement(dep_resource, 'file', href=meta_href)
+            SubElement(dep_resource, 'file', href=f'non_cc_assessments/{quiz.identifier}.xml.qti')
         
         # File resources
         for file_res in self.file_manager.files:
-            resource = SubElement(resources, 'resource')
-            resource.set('identifier', file_res.identifier)
-            resource.set('type', 'webcontent')
             # Normalize path to use forward slashes for cross-platform compatibility
             normalized_path = file_res.destination_path.replace('\\', '/')
-            resource.set('href', normalized_path)
-            SubElement(resource, 'file').set('href', normalized_path)
-        
-        # Serialize to string without pretty printing first
-        rough_string = tostring(manifest, encoding='utf-8')
-        
-        # Parse and pretty print, ensuring proper formatting
-        dom = minidom.parseString(rough_string)
+            resource = SubElement(resources, 'resource', identifier=file_res.identifier,
+                                  type='webcontent', href=normalized_path)
+            SubElement(resource, 'file', href=normalized_path)
         
-        # Custom serialization to match Canvas format
-        xml_str = dom.toprettyxml(indent="  ", encoding='UTF-8').decode('utf-8')
-        
-        # Fix empty LearningModules item to use open/close tags instead of self-closing
-        # Canvas expects <item identifier="LearningModules"></item> not <item ... />
-        xml_str = xml_str.replace(
-            '<item identifier="LearningModules"/>',
-            '<item identifier="LearningModules">\n      </item>'
-        )
-        
-        # Fix manifest tag attribute order to match Canvas exports exactly
-        # Canvas puts identifier first, then xmlns attributes
-        import re
-        manifest_pattern = r'<manifest ([^>]+)>'
-        manifest_match = re.search(manifest_pattern, xml_str)
-        if manifest_match:
-            # Rebuild manifest tag with correct attribute order
-            manifest_tag = f'<manifest identifier="{self.identifier}" xmlns="http://www.imsglobal.org/xsd/imsccv1p1/imscp_v1p1" xmlns:lom="http://ltsc.ieee.org/xsd/imsccv1p1/LOM/resource" xmlns:lomimscc="http://ltsc.ieee.org/xsd/imsccv1p1/LOM/manifest" xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" xsi:schemaLocation="http://www.imsglobal.org/xsd/imsccv1p1/imscp_v1p1 http://www.imsglobal.org/profile/cc/ccv1p1/ccv1p1_imscp_v1p2_v1p0.xsd http://ltsc.ieee.org/xsd/imsccv1p1/LOM/resource http://www.imsglobal.org/profile/cc/ccv1p1/LOM/ccv1p1_lomresource_v1p0.xsd http://ltsc.ieee.org/xsd/imsccv1p1/LOM/manifest http://www.imsglobal.org/profile/cc/ccv1p1/LOM/ccv1p1_lommanifest_v1p0.xsd">'
-            xml_str = xml_str.replace(manifest_match.group(0), manifest_tag)
-        
-        return xml_str
+        return manifest
     
     def _generate_course_settings(self) -> str:
         """Generate course_settings.xml content."""
-        course = Element('course')
-        course.set('identifier', self.identifier)
-        course.set('xmlns', 'http://canvas.instructure.com/xsd/cccv1p0')
-        course.set('xmlns:xsi', 'http://www.w3.org/2001/XMLSchema-instance')
-        course.set('xsi:schemaLocation', 
-                  'http://canvas.instructure.com/xsd/cccv1p0 '
-                  'https://canvas.instructure.com/xsd/cccv1p0.xsd')
-        
-        SubElement(course, 'title').text = self.title
-        SubElement(course, 'course_code').text = self.course_code
-        SubElement(course, 'start_at')
-        SubElement(course, 'conclude_at')
-        SubElement(course, 'is_public').text = 'false'
-        SubElement(course, 'is_public_to_auth_users').text = 'false'
-        SubElement(course, 'allow_student_wiki_edits').text = 'false'
-        SubElement(course, 'allow_student_forum_attachments').text = 'false'
-        SubElement(course, 'lock_all_announcements').text = 'false'
-        SubElement(course, 'default_wiki_editing_roles').text = 'teachers'
-        SubElement(course, 'allow_student_organized_groups').text = 'false'
-        SubElement(course, 'default_view').text = self.default_view
-        SubElement(course, 'open_enrollment').text = 'false'
-        SubElement(course, 'filter_speed_grader_by_student_group').text = 'true'
-        SubElement(course, 'self_enrollment').text = 'false'
-        SubElement(course, 'license').text = self.license
-        SubElement(course, 'indexed').text = 'false'
-        SubElement(course, 'hide_final_grade').text = 'false'
-        SubElement(course, 'hide_distribution_graphs').text = 'false'
-        SubElement(course, 'allow_student_discussion_topics').text = 'false'
-        SubElement(course, 'allow_student_discussion_editing').text = 'false'
-        SubElement(course, 'show_announcements_on_home_page').text = 'false'
-        SubElement(course, 'home_page_announcement_limit').text = '3'
-        SubElement(course, 'usage_rights_required').text = 'false'
-        SubElement(course, 'restrict_student_future_view').text = 'true'
-        SubElement(course, 'restrict_student_past_view').text = 'false'
-        SubElement(course, 'restrict_enrollments_to_course_dates').text = 'false'
-        SubElement(course, 'homeroom_course').text = 'false'
-        SubElement(course, 'horizon_course').text = 'false'
-        SubElement(course, 'conditional_release').text = 'false'
-        SubElement(course, 'content_library').text = 'false'
-        SubElement(course, 'grading_standard_enabled').text = 'false'
-        SubElement(course, 'storage_quota').text = '5000000000'
-        SubElement(course, 'overridden_course_visibility')
-        SubElement(course, 'root_account_uuid').text = generate_identifier('')  # Empty identifier for UUID
-        
-        default_post_policy = SubElement(course, 'default_post_policy')
-        SubElement(default_post_policy, 'post_manually').text = 'false'
-        
-        SubElement(course, 'enable_course_paces').text = 'false'
-        
-        rough_string = tostring(course, encoding='utf-8')
-        reparsed = minidom.parseString(rough_string)
-        xml_str = reparsed.toprettyxml(indent="  ", encoding='UTF-8').decode('utf-8')
-        
-        # Fix course tag attribute order to match Canvas (identifier first)
-        import re
-        course_pattern = r'<course ([^>]+)>'
-        course_match = re.search(course_pattern, xml_str)
-        if course_match:
-            course_tag = f'<course identifier="{self.identifier}" xmlns="http://canvas.instructure.com/xsd/cccv1p0" xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" xsi:schemaLocation="http://canvas.instructure.com/xsd/cccv1p0 https://canvas.instructure.com/xsd/cccv1p0.xsd">'
-            xml_str = xml_str.replace(course_match.group(0), course_tag)
-        
-        return xml_str
+        return _COURSE_SETTINGS_TEMPLATE.format(
+            identifier=escape_xml(self.identifier),
+            title=escape_xml(self.title),
+            course_code=escape_xml(self.course_code),
+            default_view=escape_xml(self.default_view),
+            license=escape_xml(self.license),
+            root_account_uuid=generate_identifier(''),  # Empty identifier for UUID
+        )
     
     def _generate_module_meta(self) -> str:
         """Generate module_meta.xml content."""
-        modules_elem = Element('modules')
-        modules_elem.set('xmlns', 'http://canvas.instructure.com/xsd/cccv1p0')
-        modules_elem.set('xmlns:xsi', 'http://www.w3.org/2001/XMLSchema-instance')
-        modules_elem.set('xsi:schemaLocation',
-                        'http://canvas.instructure.com/xsd/cccv1p0 '
-                        'https://canvas.instructure.com/xsd/cccv1p0.xsd')
+        parts = [
+            '<?xml version="1.0" encoding="UTF-8"?>\n'
+            '<modules xmlns="http://canvas.instructure.com/xsd/cccv1p0" xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" xsi:schemaLocation="http://canvas.instructure.com/xsd/cccv1p0 https://canvas.instructure.com/xsd/cccv1p0.xsd">\n'
+        ]
         
         for module in self.modules:
-            module_elem = SubElement(modules_elem, 'module')
-            module_elem.set('identifier', module.identifier)
-            
-            SubElement(module_elem, 'title').text = module.title
-            SubElement(module_elem, 'workflow_state').text = module.workflow_state
-            SubElement(module_elem, 'position').text = str(module.position)
-            SubElement(module_elem, 'require_sequential_progress').text = str(module.require_sequential_progress).lower()
-            SubElement(module_elem, 'locked').text = str(module.locked).lower()
+            parts.append(_MODULE_TEMPLATE.format(
+                identifier=escape_xml(module.identifier),
+                title=escape_xml(module.title),
+                workflow_state=escape_xml(module.workflow_state),
+                position=module.position,
+                require_sequential_progress=str(module.require_sequential_progress).lower(),
+                locked=str(module.locked).lower(),
+            ))
             
-            items_elem = SubElement(module_elem, 'items')
+            if not module.items:
+                parts.append('    <items/>\n')
+                parts.append('  </module>\n')
+                continue
             
+            parts.append('    <items>\n')
             for item in module.items:
-                item_elem = SubElement(items_elem, 'item')
-                item_elem.set('identifier', item.identifier)
-                
-                SubElement(item_elem, 'content_type').text = item.content_type
-                SubElement(item_elem, 'workflow_state').text = item.workflow_state
-                SubElement(item_elem, 'title').text = item.title
-                SubElement(item_elem, 'identifierref').text = item.identifierref
-                SubElement(item_elem, 'position').text = str(item.position)
-                SubElement(item_elem, 'new_tab')
-                SubElement(item_elem, 'indent').text = str(item.indent)
-                SubElement(item_elem, 'link_settings_json').text = 'null'
-        
-        rough_string = tostring(modules_elem, encoding='unicode')
-        reparsed = minidom.parseString(rough_string)
-        return reparsed.toprettyxml(indent="  ", encoding='UTF-8').decode('utf-8')
+                parts.append(_MODULE_ITEM_TEMPLATE.format(
+                    identifier=escape_xml(item.identifier),
+                    content_type=escape_xml(item.content_type),
+                    workflow_state=escape_xml(item.workflow_state),
+                    title=escape_xml(item.title),
+                    identifierref=escape_xml(item.identifierref),
+                    position=item.position,
+                    indent=item.indent,
+                ))
+            parts.append('    </items>\n')
+            parts.append('  </module>\n')
+        
+        parts.append('</modules>\n')
+        return ''.join(parts)
     
     def _generate_assignment_groups(self) -> str:
         """Generate assignment_groups.xml content."""
@@ -509,11 +597,9 @@ class Course:
                        'https://canvas.instructure.com/xsd/cccv1p0.xsd')
         
         for group in self.assignment_groups:
-            groups_elem.append(group.to_xml())
+            group.to_xml(groups_elem)
         
-        rough_string = tostring(groups_elem, encoding='unicode')
-        reparsed = minidom.parseString(rough_string)
-        return reparsed.toprettyxml(indent="  ", encoding='UTF-8').decode('utf-8')
+        return to_pretty_xml(groups_elem)
     
     def _generate_rubrics(self) -> str:
         """Generate rubrics.xml content."""
@@ -525,159 +611,147 @@ class Course:
                         'https://canvas.instructure.com/xsd/cccv1p0.xsd')
         
         for rubric in self.rubrics:
-            rubrics_elem.append(rubric.to_xml())
+            rubric.to_xml(rubrics_elem)
         
-        rough_string = tostring(rubrics_elem, encoding='unicode')
-        reparsed = minidom.parseString(rough_string)
-        return reparsed.toprettyxml(indent="  ", encoding='UTF-8').decode('utf-8')
+        return to_pretty_xml(rubrics_elem)
+    
+    def _generate_files_meta(self) -> str:
+        """Generate files_meta.xml content with the folder structure."""
+        # Extract unique folder paths from file resources
+        folders = set()
+        for file_res in self.file_manager.files:
+            # Add all parent folders below the top-level directory
+            # (excluding the file itself) by walking the separators once
+            path = file_res.destination_path.replace('\\', '/')
+            start = path.find('/') + 1
+            if not start:
+                continue
+            end = path.find('/', start)
+            while end >= 0:
+                folders.add(path[start:end])
+                end = path.find('/', end + 1)
+        
+        lines = [
+            '<?xml version="1.0" encoding="UTF-8"?>',
+            '<fileMeta xmlns="http://canvas.instructure.com/xsd/cccv1p0" xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" xsi:schemaLocation="http://canvas.instructure.com/xsd/cccv1p0 https://canvas.instructure.com/xsd/cccv1p0.xsd">',
+        ]
+        
+        # Write folder definitions if any exist
+        if folders:
+            lines.append('  <folders>')
+            lines.extend(
+                f'    <folder path="{escape_xml(folder)}">\n'
+                '      <hidden>false</hidden>\n'
+                '    </folder>'
+                for folder in sorted(folders)
+            )
+            lines.append('  </folders>')
+        
+        lines.append('</fileMeta>\n')
+        return '\n'.join(lines)
+    
+    def _write_manifest(self, fileobj) -> None:
+        """Write imsmanifest.xml to a binary file object."""
+        write_pretty_xml(self._build_manifest(), fileobj)
+    
+    def _iter_entries(self) -> Iterator[Tuple[str, Any]]:
+        """
+        Yield (arcname, payload) for every generated document in the package.
+        
+        A payload is the document as str or bytes, or a callable that writes
+        the document to a binary file object. Documents that grow with the
+        course (the manifest, full QTI files and long wiki pages) use the
+        callable form so they can be streamed into the archive. Nothing is
+        rendered until the consumer asks for the next entry.
+        """
+        yield 'imsmanifest.xml', self._write_manifest
+        
+        # Course settings
+        yield 'course_settings/course_settings.xml', self._generate_course_settings()
+        yield 'course_settings/files_meta.xml', self._generate_files_meta()
+        yield 'course_settings/context.xml', _CONTEXT_TEMPLATE.format(title=escape_xml(self.title))
+        yield 'course_settings/media_tracks.xml', _MEDIA_TRACKS_XML
+        yield 'course_settings/canvas_export.txt', _CANVAS_EXPORT_TXT
+        
+        if self.modules:
+            yield 'course_settings/module_meta.xml', self._generate_module_meta()
+        if self.assignment_groups:
+            yield 'course_settings/assignment_groups.xml', self._generate_assignment_groups()
+        if self.rubrics:
+            yield 'course_settings/rubrics.xml', self._generate_rubrics()
+        
+        # Assignments
+        for assignment in self.assignments:
+            yield f'{assignment.identifier}/assignment.html', assignment.get_html_content()
+            yield f'{assignment.identifier}/assignment_settings.xml', assignment.to_xml()
+        
+        # Quizzes; the full QTI XML goes to non_cc_assessments
+        for quiz in self.quizzes:
+            yield f'{quiz.identifier}/assessment_meta.xml', quiz.to_assessment_meta_xml()
+            yield f'{quiz.identifier}/assessment_qti.xml', quiz.to_assessment_qti_xml()
+            yield f'non_cc_assessments/{quiz.identifier}.xml.qti', quiz.write_qti_xml
+        
+        # Wiki pages; short ones stay strings so they are still stored
+        # without deflating
+        for page in self.pages:
+            if len(page.content) < _MIN_DEFLATE_SIZE:
+                yield f'wiki_content/{page.filename}', page.to_html()
+            else:
+                yield f'wiki_content/{page.filename}', page.write_html
     
     def export(self, output_path: str) -> None:
         """
         Export the course as an IMSCC file.
         
+        Generated documents are written straight into the archive, so no
+        temporary directory is needed.
+        
         Args:
             output_path: Path for the output .imscc file
         """
-        # Create temporary directory for building the package
-        with tempfile.TemporaryDirectory() as temp_dir:
-            # Create directory structure
-            ensure_dir(os.path.join(temp_dir, 'course_settings'))
-            ensure_dir(os.path.join(temp_dir, 'wiki_content'))
-            ensure_dir(os.path.join(temp_dir, 'non_cc_assessments'))
-            
-            # Write manifest
-            manifest_path = os.path.join(temp_dir, 'imsmanifest.xml')
-            with open(manifest_path, 'w', encoding='utf-8') as f:
-                f.write(self._generate_manifest())
-            
-            # Write course settings
-            settings_path = os.path.join(temp_dir, 'course_settings', 'course_settings.xml')
-            with open(settings_path, 'w', encoding='utf-8') as f:
-                f.write(self._generate_course_settings())
-            
-            # Write files_meta.xml with folder structure
-            files_meta_path = os.path.join(temp_dir, 'course_settings', 'files_meta.xml')
-            with open(files_meta_path, 'w', encoding='utf-8') as f:
-                f.write('<?xml version="1.0" encoding="UTF-8"?>\n')
-                f.write('<fileMeta xmlns="http://canvas.instructure.com/xsd/cccv1p0" xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" xsi:schemaLocation="http://canvas.instructure.com/xsd/cccv1p0 https://canvas.instructure.com/xsd/cccv1p0.xsd">\n')
-                
-                # Extract unique folder paths from file resources
-                folders = set()
-                for file_res in self.file_manager.files:
-                    # Get directory path from destination_path
-                    dest_path = Path(file_res.destination_path)
-                    if len(dest_path.parts) > 1:  # Has subdirectories
-                        # Add all parent folders (excluding the file itself)
-                        for i in range(1, len(dest_path.parts) - 1):
-                            folder_path = '/'.join(dest_path.parts[1:i+1])
-                            folders.add(folder_path)
-                
-                # Write folder definitions if any exist
-                if folders:
-                    f.write('  <folders>\n')
-                    for folder in sorted(folders):
-                        f.write(f'    <folder path="{folder}">\n')
-                        f.write('      <hidden>false</hidden>\n')
-                        f.write('    </folder>\n')
-                    f.write('  </folders>\n')
-                
-                f.write('</fileMeta>\n')
-            
-            context_path = os.path.join(temp_dir, 'course_settings', 'context.xml')
-            with open(context_path, 'w', encoding='utf-8') as f:
-                f.write('<?xml version="1.0" encoding="UTF-8"?>\n')
-                f.write('<context_info xmlns="http://canvas.instructure.com/xsd/cccv1p0" xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" xsi:schemaLocation="http://canvas.instructure.com/xsd/cccv1p0 https://canvas.instructure.com/xsd/cccv1p0.xsd">\n')
-                f.write(f'  <course_name>{self.title}</course_name>\n')
-                f.write('</context_info>\n')
-            
-            media_tracks_path = os.path.join(temp_dir, 'course_settings', 'media_tracks.xml')
-            with open(media_tracks_path, 'w', encoding='utf-8') as f:
-                f.write('<?xml version="1.0" encoding="UTF-8"?>\n')
-                f.write('<media_tracks xmlns="http://canvas.instructure.com/xsd/cccv1p0" xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" xsi:schemaLocation="http://canvas.instructure.com/xsd/cccv1p0 https://canvas.instructure.com/xsd/cccv1p0.xsd"/>\n')
-            
-            canvas_export_path = os.path.join(temp_dir, 'course_settings', 'canvas_export.txt')
-            with open(canvas_export_path, 'w', encoding='utf-8') as f:
-                # Canvas includes a joke in this file
-                f.write('Q: What did the canvas say to the students?\n')
-                f.write('A: I\'ve got you covered!')
-            
-            # Create non_cc_assessments directory (even if empty)
-            non_cc_dir = os.path.join(temp_dir, 'non_cc_assessments')
-            ensure_dir(non_cc_dir)
-            # Add .keep file so directory is included in ZIP
-            with open(os.path.join(non_cc_dir, '.keep'), 'w') as f:
-                f.write('')
-            
-            # Write module metadata if modules exist
-            if self.modules:
-                module_meta_path = os.path.join(temp_dir, 'course_settings', 'module_meta.xml')
-                with open(module_meta_path, 'w', encoding='utf-8') as f:
-                    f.write(self._generate_module_meta())
-            
-            # Write assignment groups if they exist
-            if self.assignment_groups:
-                assignment_groups_path = os.path.join(temp_dir, 'course_settings', 'assignment_groups.xml')
-                with open(assignment_groups_path, 'w', encoding='utf-8') as f:
-                    f.write(self._generate_assignment_groups())
-            
-            # Write rubrics if they exist
-            if self.rubrics:
-                rubrics_path = os.path.join(temp_dir, 'course_settings', 'rubrics.xml')
-                with open(rubrics_path, 'w', encoding='utf-8') as f:
-                    f.write(self._generate_rubrics())
-            
-            # Write assignments
-            for assignment in self.assignments:
-                # Create assignment directory
-                assignment_dir = os.path.join(temp_dir, assignment.identifier)
-                ensure_dir(assignment_dir)
-                
-                # Write assignment HTML
-                html_path = os.path.join(assignment_dir, 'assignment.html')
-                with open(html_path, 'w', encoding='utf-8') as f:
-                    f.write(assignment.get_html_content())
-                
-                # Write assignment settings XML
-                settings_path = os.path.join(assignment_dir, 'assignment_settings.xml')
-                with open(settings_path, 'w', encoding='utf-8') as f:
-                    f.write(assignment.to_xml())
-            
-            # Write quizzes
-            for quiz in self.quizzes:
-                # Create quiz directory
-                quiz_dir = os.path.join(temp_dir, quiz.identifier)
-                ensure_dir(quiz_dir)
-                
-                # Write assessment_meta.xml
-                meta_path = os.path.join(quiz_dir, 'assessment_meta.xml')
-                with open(meta_path, 'w', encoding='utf-8') as f:
-                    f.write(quiz.to_assessment_meta_xml())
+        output_path = os.fspath(output_path)
+        output_dir = os.path.dirname(output_path)
+        if output_dir:
+            ensure_dir(output_dir)
+        
+        # Small packages are assembled in memory and written to disk in one
+        # call. The zip writer seeks back to patch each member's local header,
+        # which is free in a BytesIO but a flush and seek on a real file.
+        files_size = sum(os.path.getsize(f.filepath) for f in self.file_manager.files)
+        in_memory = files_size < _IN_MEMORY_EXPORT_LIMIT
+        target = io.BytesIO() if in_memory else output_path
+        
+        try:
+            with zipfile.ZipFile(target, 'w', zipfile.ZIP_DEFLATED) as zipf:
+                for arcname, payload in _pipelined(self._iter_entries()):
+                    if callable(payload):
+                        with zipf.open(arcname, 'w') as out:
+                            payload(out)
+                    else:
+                        _writestr(zipf, arcname, payload)
+                    # Drop the written document right away; with the render
+                    # pipeline at most _PIPELINE_DEPTH more are queued and one
+                    # more is being built
+                    del payload
                 
-                # Write assessment_qti.xml (shell)
-                qti_path = os.path.join(quiz_dir, 'assessment_qti.xml')
-                with open(qti_path, 'w', encoding='utf-8') as f:
-                    f.write(quiz.to_assessment_qti_xml())
+                # Create non_cc_assessments directory (even if empty)
+                non_cc_dir = zipfile.ZipInfo('non_cc_assessments/', date_time=time.localtime()[:6])
+                non_cc_dir.external_attr = 0o40755 << 16  # drwxr-xr-x
+                zipf.writestr(non_cc_dir, b'')
                 
-                # Write full QTI XML to non_cc_assessments
-                qti_full_path = os.path.join(temp_dir, 'non_cc_assessments', f'{quiz.identifier}.xml.qti')
-                with open(qti_full_path, 'w', encoding='utf-8') as f:
-                    f.write(quiz.to_qti_xml())
-            
-            # Write wiki pages
-            for page in self.pages:
-                page_path = os.path.join(temp_dir, 'wiki_content', page.filename)
-                with open(page_path, 'w', encoding='utf-8') as f:
-                    f.write(page.to_html())
-            
-            # Copy files
-            self.file_manager.copy_all(temp_dir)
-            
-            # Create ZIP file
-            with zipfile.ZipFile(output_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-                for root, dirs, files in os.walk(temp_dir):
-                    for file in files:
-                        file_path = os.path.join(root, file)
-                        arcname = os.path.relpath(file_path, temp_dir)
-                        zipf.write(file_path, arcname)
+                # Add course files
+                self.file_manager.write_to_zip(zipf)
+        except BaseException:
+            # Don't leave a truncated package behind
+            if not in_memory:
+                try:
+                    os.remove(output_path)
+                except OSError:
+                    pass
+            raise
+        
+        if in_memory:
+            with open(output_path, 'wb') as f:
+                f.write(target.getbuffer())
         
         print(f"✓ IMSCC package created: {output_path}")
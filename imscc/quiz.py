@@ -1,17 +1,264 @@
 """Quiz classes for Canvas quizzes with QTI question support."""
 
-from typing import Optional, List, Dict, Any, Tuple
+import io
+import os
+import random
+from typing import Optional, List, Dict, Any, Iterable, Tuple
 from datetime import datetime
-from xml.etree.ElementTree import Element, SubElement, tostring
-from xml.dom import minidom
-from .utils import generate_identifier
+from xml.etree.ElementTree import Element, SubElement, indent, tostring
+from .utils import generate_identifier, escape_xml, text_element
 import uuid
 
 
+# Opening of the full QTI document, up to the section that holds the items.
+# The prolog is the same for every quiz, so it is kept pre-encoded.
+_QTI_PROLOG = (
+    b'<?xml version="1.0" encoding="UTF-8"?>\n'
+    b'<questestinterop xmlns="http://www.imsglobal.org/xsd/ims_qtiasiv1p2" xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" xsi:schemaLocation="http://www.imsglobal.org/xsd/ims_qtiasiv1p2 http://www.imsglobal.org/xsd/ims_qtiasiv1p2p1.xsd">\n'
+)
+
+_QTI_ASSESSMENT_HEAD_TEMPLATE = """\
+  <assessment ident="{identifier}" title="Question">
+    <qtimetadata>
+      <qtimetadatafield>
+        <fieldlabel>cc_maxattempts</fieldlabel>
+        <fieldentry>{allowed_attempts}</fieldentry>
+      </qtimetadatafield>
+    </qtimetadata>
+"""
+
+_QTI_EMPTY_SECTION = b'    <section ident="root_section" />\n'
+_QTI_SECTION_OPEN = b'    <section ident="root_section">'
+_QTI_ITEM_INDENT = b'\n      '
+_QTI_SECTION_CLOSE = b'\n    </section>\n'
+_QTI_EPILOG = b'  </assessment>\n</questestinterop>\n'
+
+
+# Question and answer ids only have to be unique within a package, not
+# unpredictable, so they come from a generator seeded once from os.urandom
+# (and reseeded in forked children) instead of a syscall per id
+_id_rng = random.Random(os.urandom(16))
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=lambda: _id_rng.seed(os.urandom(16)))
+
+
+def _uuid4_batch(count: int) -> List[str]:
+    """Generate count random UUID strings."""
+    getrandbits = _id_rng.getrandbits
+    return [str(uuid.UUID(int=getrandbits(128), version=4)) for _ in range(count)]
+
+
+def _add_meta(qtimetadata: Element, label: str, entry: str) -> Element:
+    """Append a qtimetadatafield with the given label and entry."""
+    field = SubElement(qtimetadata, 'qtimetadatafield')
+    SubElement(field, 'fieldlabel').text = label
+    SubElement(field, 'fieldentry').text = entry
+    return field
+
+
+def _response_labels(choices: Iterable[Tuple[str, str]], texttype: str = 'text/plain') -> List[Element]:
+    """Build detached response_label elements for (ident, text) pairs."""
+    labels = []
+    for ident, text in choices:
+        label = Element('response_label', ident=ident)
+        SubElement(SubElement(label, 'material'), 'mattext', texttype=texttype).text = text
+        labels.append(label)
+    return labels
+
+
+# A true/false item differs only in its ids, points and question text, so
+# its serialized form (indented as in write_qti_xml) is formatted directly
+_TRUE_FALSE_ITEM_TEMPLATE = """\
+<item ident="{ident_attr}" title="Question">
+        <itemmetadata>
+          <qtimetadata>
+            <qtimetadatafield>
+              <fieldlabel>question_type</fieldlabel>
+              <fieldentry>true_false_question</fieldentry>
+            </qtimetadatafield>
+            <qtimetadatafield>
+              <fieldlabel>points_possible</fieldlabel>
+              <fieldentry>{points}</fieldentry>
+            </qtimetadatafield>
+            <qtimetadatafield>
+              <fieldlabel>original_answer_ids</fieldlabel>
+              <fieldentry>{true_id},{false_id}</fieldentry>
+            </qtimetadatafield>
+            <qtimetadatafield>
+              <fieldlabel>assessment_question_identifierref</fieldlabel>
+              <fieldentry>{ident}</fieldentry>
+            </qtimetadatafield>
+          </qtimetadata>
+        </itemmetadata>
+        <presentation>
+          <material>
+            <mattext texttype="text/html">{question_text}</mattext>
+          </material>
+          <response_lid ident="response1" rcardinality="Single">
+            <render_choice>
+              <response_label ident="{true_id_attr}">
+                <material>
+                  <mattext texttype="text/plain">True</mattext>
+                </material>
+              </response_label>
+              <response_label ident="{false_id_attr}">
+                <material>
+                  <mattext texttype="text/plain">False</mattext>
+                </material>
+              </response_label>
+            </render_choice>
+          </response_lid>
+        </presentation>
+        <resprocessing>
+          <outcomes>
+            <decvar maxvalue="100" minvalue="0" varname="SCORE" vartype="Decimal" />
+          </outcomes>
+          <respcondition continue="No">
+            <conditionvar>
+              <varequal respident="response1">{correct_id}</varequal>
+            </conditionvar>
+            <setvar action="Set" varname="SCORE">100</setvar>
+          </respcondition>
+        </resprocessing>
+      </item>"""
+
+
+# assessment_qti.xml only points at the full QTI document; it is the same
+# small shell for every quiz apart from its ident and attempt limit
+_ASSESSMENT_QTI_SHELL_TEMPLATE = """\
+<?xml version="1.0" encoding="UTF-8"?>
+<questestinterop xmlns="http://www.imsglobal.org/xsd/ims_qtiasiv1p2" xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" xsi:schemaLocation="http://www.imsglobal.org/xsd/ims_qtiasiv1p2 http://www.imsglobal.org/profile/cc/ccv1p1/ccv1p1_qtiasiv1p2p1_v1p0.xsd">
+  <assessment ident="{identifier}" title="Question">
+    <qtimetadata>
+      <qtimetadatafield>
+        <fieldlabel>cc_profile</fieldlabel>
+        <fieldentry>cc.exam.v0p1</fieldentry>
+      </qtimetadatafield>
+      <qtimetadatafield>
+        <fieldlabel>qmd_assessmenttype</fieldlabel>
+        <fieldentry>Examination</fieldentry>
+      </qtimetadatafield>
+      <qtimetadatafield>
+        <fieldlabel>qmd_scoretype</fieldlabel>
+        <fieldentry>Percentage</fieldentry>
+      </qtimetadatafield>
+      <qtimetadatafield>
+        <fieldlabel>cc_maxattempts</fieldlabel>
+        <fieldentry>{allowed_attempts}</fieldentry>
+      </qtimetadatafield>
+    </qtimetadata>
+    <section ident="root_section"/>
+  </assessment>
+</questestinterop>
+"""
+
+# assessment_meta.xml is fixed markup apart from the quiz settings, so it is
+# rendered from a template rather than built element by element. The
+# embedded assignment repeats the quiz's title and dates.
+_ASSESSMENT_META_TEMPLATE = """\
+<?xml version="1.0" encoding="UTF-8"?>
+<quiz xmlns="http://canvas.instructure.com/xsd/cccv1p0" xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" xsi:schemaLocation="http://canvas.instructure.com/xsd/cccv1p0 https://canvas.instructure.com/xsd/cccv1p0.xsd" identifier="{identifier}">
+  {title}
+  {description}
+  {due_at}
+  {lock_at}
+  {unlock_at}
+  <shuffle_questions>{shuffle_questions}</shuffle_questions>
+  <shuffle_answers>{shuffle_answers}</shuffle_answers>
+  {calculator_type}
+  {scoring_policy}
+  {hide_results}
+  {quiz_type}
+  <points_possible>{points_possible}</points_possible>
+  <require_lockdown_browser>{require_lockdown_browser}</require_lockdown_browser>
+  <require_lockdown_browser_for_results>false</require_lockdown_browser_for_results>
+  <require_lockdown_browser_monitor>false</require_lockdown_browser_monitor>
+  <lockdown_browser_monitor_data/>
+  <show_correct_answers>{show_correct_answers}</show_correct_answers>
+  <anonymous_submissions>{anonymous_submissions}</anonymous_submissions>
+  <could_be_locked>{could_be_locked}</could_be_locked>
+  <disable_timer_autosubmission>false</disable_timer_autosubmission>
+  <allowed_attempts>{allowed_attempts}</allowed_attempts>
+  <build_on_last_attempt>false</build_on_last_attempt>
+  <one_question_at_a_time>{one_question_at_a_time}</one_question_at_a_time>
+  <cant_go_back>{cant_go_back}</cant_go_back>
+  <available>false</available>
+  <one_time_results>false</one_time_results>
+  <show_correct_answers_last_attempt>false</show_correct_answers_last_attempt>
+  <only_visible_to_overrides>false</only_visible_to_overrides>
+  <module_locked>false</module_locked>
+  <allow_clear_mc_selection/>
+  <disable_document_access>false</disable_document_access>
+  <result_view_restricted>false</result_view_restricted>
+  <assignment identifier="{assignment_identifier}">
+    {title}
+    {due_at}
+    {lock_at}
+    {unlock_at}
+    <module_locked>false</module_locked>
+    {workflow_state}
+    <assignment_overrides/>
+    <assignment_overrides/>
+    <quiz_identifierref>{identifier}</quiz_identifierref>
+    <allowed_extensions/>
+    <has_group_category>false</has_group_category>
+    <points_possible>{points_possible}</points_possible>
+    <grading_type>points</grading_type>
+    <all_day>false</all_day>
+    <submission_types>online_quiz</submission_types>
+    <position>1</position>
+    <turnitin_enabled>false</turnitin_enabled>
+    <vericite_enabled>false</vericite_enabled>
+    <peer_review_count>0</peer_review_count>
+    <peer_reviews>false</peer_reviews>
+    <automatic_peer_reviews>false</automatic_peer_reviews>
+    <anonymous_peer_reviews>false</anonymous_peer_reviews>
+    <grade_group_students_individually>false</grade_group_students_individually>
+    <freeze_on_copy>false</freeze_on_copy>
+    <omit_from_final_grade>false</omit_from_final_grade>
+    <intra_group_peer_reviews>false</intra_group_peer_reviews>
+    <only_visible_to_overrides>false</only_visible_to_overrides>
+    <post_to_sis>false</post_to_sis>
+    <moderated_grading>false</moderated_grading>
+    <grader_count>0</grader_count>
+    <grader_comments_visible_to_graders>true</grader_comments_visible_to_graders>
+    <anonymous_grading>false</anonymous_grading>
+    <graders_anonymous_to_graders>false</graders_anonymous_to_graders>
+    <grader_names_visible_to_final_grader>true</grader_names_visible_to_final_grader>
+    <anonymous_instructor_annotations>false</anonymous_instructor_annotations>
+    <post_policy>
+      <post_manually>false</post_manually>
+    </post_policy>{group_ref}
+    <assignment_overrides/>
+  </assignment>
+</quiz>
+"""
+
+
+def _bool_text(value: Any) -> str:
+    """Render a flag as 'true'/'false'; other values keep str(value).lower()."""
+    if value is True:
+        return 'true'
+    if value is False:
+        return 'false'
+    return str(value).lower()
+
+
+def _escape_text(text: str) -> str:
+    """Escape text for element content the way ElementTree serializes it."""
+    if '&' not in text and '<' not in text and '>' not in text:
+        return text
+    return text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+
 
 class QuizQuestion:
     """Base class for quiz questions."""
     
+    # '__dict__' keeps ad-hoc attributes (q.custom = 1) working; the dict is
+    # only created for instances that actually set one
+    __slots__ = ('question_text', 'identifier', 'question_type',
+                 '_points_possible', '_points_str', '__dict__')
+    
     def __init__(
         self,
         question_text: str,
@@ -30,19 +277,62 @@ class QuizQuestion:
         self.points_possible = points_possible
         self.identifier = identifier or self._generate_question_id()
         self.question_type = "question"  # Override in subclasses
+    
+    @property
+    def points_possible(self) -> float:
+        """Points for this question."""
+        return self._points_possible
+    
+    @points_possible.setter
+    def points_possible(self, value: float) -> None:
+        self._points_possible = value
+        # Rendered once here rather than on every to_qti_item() call
+        self._points_str = str(value)
+    
+    @property
+    def qti_bytes(self) -> bytes:
+        """
+        This question's QTI item as UTF-8, indented for the quiz's section.
         
+        Rendered from the question's current attributes on every access,
+        so edits made after an earlier render are always picked up.
+        """
+        return self._render_qti()
+    
+    def _render_qti(self) -> bytes:
+        """Serialize the item as it appears in the quiz's section."""
+        item = self.to_qti_item()
+        indent(item, space="  ", level=3)
+        return tostring(item, encoding='utf-8')
+    
     def _generate_question_id(self) -> str:
         """Generate a unique question identifier."""
-        return uuid.uuid4().hex
+        return f'{_id_rng.getrandbits(128):032x}'
     
     def to_qti_item(self) -> Element:
-        """Generate QTI item element. Must be implemented by subclasses."""
-        raise NotImplementedError("Subclasses must implement to_qti_item()")
+        """Generate a standalone QTI item element."""
+        return self.populate_item(Element('section'))
+    
+    def populate_item(self, parent: Element) -> Element:
+        """
+        Build this question's QTI item directly under parent.
+        
+        Must be implemented by subclasses.
+        
+        Args:
+            parent: Element the new item is created in (e.g. a section)
+            
+        Returns:
+            The created item element
+        """
+        raise NotImplementedError("Subclasses must implement populate_item()")
 
 
 class MultipleChoiceQuestion(QuizQuestion):
     """Multiple choice question with one correct answer."""
     
+    __slots__ = ('answers',)
+    
     def __init__(
         self,
         question_text: str,
@@ -68,38 +358,40 @@ class MultipleChoiceQuestion(QuizQuestion):
         self.question_type = "multiple_choice_question"
         
         # Generate UUIDs for each answer
-        for answer in self.answers:
-            if 'id' not in answer:
-                answer['id'] = str(uuid.uuid4())
+        self._assign_answer_ids()
     
-    def to_qti_item(self) -> Element:
+    def _assign_answer_ids(self) -> None:
+        """Give every answer without an 'id' a new UUID."""
+        missing = [answer for answer in self.answers if 'id' not in answer]
+        if missing:
+            for answer, answer_id in zip(missing, _uuid4_batch(len(missing))):
+                answer['id'] = answer_id
+    
+    def populate_item(self, parent: Element) -> Element:
         """Generate QTI item XML for multiple choice question."""
-        item = Element('item', ident=self.identifier, title=f"Question")
+        # Answers may have been added or edited since __init__; ones added
+        # without an id get one now and keep it for later renders
+        self._assign_answer_ids()
+        answer_idents = [a['id'] for a in self.answers]
+        answer_texts = [a['text'] for a in self.answers]
+        
+        item = SubElement(parent, 'item', ident=self.identifier, title=f"Question")
         
         # Item metadata
         itemmetadata = SubElement(item, 'itemmetadata')
         qtimetadata = SubElement(itemmetadata, 'qtimetadata')
         
         # Question type
-        field = SubElement(qtimetadata, 'qtimetadatafield')
-        SubElement(field, 'fieldlabel').text = 'question_type'
-        SubElement(field, 'fieldentry').text = self.question_type
+        _add_meta(qtimetadata, 'question_type', self.question_type)
         
         # Points possible
-        field = SubElement(qtimetadata, 'qtimetadatafield')
-        SubElement(field, 'fieldlabel').text = 'points_possible'
-        SubElement(field, 'fieldentry').text = str(self.points_possible)
+        _add_meta(qtimetadata, 'points_possible', self._points_str)
         
         # Original answer IDs
-        field = SubElement(qtimetadata, 'qtimetadatafield')
-        SubElement(field, 'fieldlabel').text = 'original_answer_ids'
-        answer_ids = ','.join([a['id'] for a in self.answers])
-        SubElement(field, 'fieldentry').text = answer_ids
+        _add_meta(qtimetadata, 'original_answer_ids', ','.join(answer_idents))
         
         # Assessment question reference
-        field = SubElement(qtimetadata, 'qtimetadatafield')
-        SubElement(field, 'fieldlabel').text = 'assessment_question_identifierref'
-        SubElement(field, 'fieldentry').text = self.identifier
+        _add_meta(qtimetadata, 'assessment_question_identifierref', self.identifier)
         
         # Presentation (question text and answers)
         presentation = SubElement(item, 'presentation')
@@ -112,12 +404,8 @@ class MultipleChoiceQuestion(QuizQuestion):
                                  ident='response1', rcardinality='Single')
         render_choice = SubElement(response_lid, 'render_choice')
         
-        for answer in self.answers:
-            response_label = SubElement(render_choice, 'response_label', 
-                                       ident=answer['id'])
-            ans_material = SubElement(response_label, 'material')
-            ans_mattext = SubElement(ans_material, 'mattext', texttype='text/html')
-            ans_mattext.text = answer['text']
+        render_choice.extend(_response_labels(
+            zip(answer_idents, answer_texts), 'text/html'))
         
         # Response processing (correct answer)
         resprocessing = SubElement(item, 'resprocessing')
@@ -125,14 +413,14 @@ class MultipleChoiceQuestion(QuizQuestion):
         SubElement(outcomes, 'decvar', maxvalue='100', minvalue='0', 
                   varname='SCORE', vartype='Decimal')
         
-        # Find correct answer
-        correct_answer = next((a for a in self.answers if a.get('correct')), None)
-        if correct_answer:
+        # Find correct answer, as currently marked
+        correct_id = next((a['id'] for a in self.answers if a.get('correct')), None)
+        if correct_id is not None:
             respcondition = SubElement(resprocessing, 'respcondition')
             respcondition.set('continue', 'No')
             conditionvar = SubElement(respcondition, 'conditionvar')
             varequal = SubElement(conditionvar, 'varequal', respident='response1')
-            varequal.text = correct_answer['id']
+            varequal.text = correct_id
             setvar = SubElement(respcondition, 'setvar', action='Set', varname='SCORE')
             setvar.text = '100'
         
@@ -142,6 +430,8 @@ class MultipleChoiceQuestion(QuizQuestion):
 class TrueFalseQuestion(QuizQuestion):
     """True/False question."""
     
+    __slots__ = ('correct_answer', 'true_id', 'false_id')
+    
     def __init__(
         self,
         question_text: str,
@@ -161,32 +451,20 @@ class TrueFalseQuestion(QuizQuestion):
         super().__init__(question_text, points_possible, identifier)
         self.correct_answer = correct_answer
         self.question_type = "true_false_question"
-        self.true_id = str(uuid.uuid4())
-        self.false_id = str(uuid.uuid4())
+        self.true_id, self.false_id = _uuid4_batch(2)
     
-    def to_qti_item(self) -> Element:
+    def populate_item(self, parent: Element) -> Element:
         """Generate QTI item XML for true/false question."""
-        item = Element('item', ident=self.identifier, title="Question")
+        item = SubElement(parent, 'item', ident=self.identifier, title="Question")
         
         # Item metadata
         itemmetadata = SubElement(item, 'itemmetadata')
         qtimetadata = SubElement(itemmetadata, 'qtimetadata')
         
-        field = SubElement(qtimetadata, 'qtimetadatafield')
-        SubElement(field, 'fieldlabel').text = 'question_type'
-        SubElement(field, 'fieldentry').text = self.question_type
-        
-        field = SubElement(qtimetadata, 'qtimetadatafield')
-        SubElement(field, 'fieldlabel').text = 'points_possible'
-        SubElement(field, 'fieldentry').text = str(self.points_possible)
-        
-        field = SubElement(qtimetadata, 'qtimetadatafield')
-        SubElement(field, 'fieldlabel').text = 'original_answer_ids'
-        SubElement(field, 'fieldentry').text = f"{self.true_id},{self.false_id}"
-        
-        field = SubElement(qtimetadata, 'qtimetadatafield')
-        SubElement(field, 'fieldlabel').text = 'assessment_question_identifierref'
-        SubElement(field, 'fieldentry').text = self.identifier
+        _add_meta(qtimetadata, 'question_type', self.question_type)
+        _add_meta(qtimetadata, 'points_possible', self._points_str)
+        _add_meta(qtimetadata, 'original_answer_ids', f"{self.true_id},{self.false_id}")
+        _add_meta(qtimetadata, 'assessment_question_identifierref', self.identifier)
         
         # Presentation
         presentation = SubElement(item, 'presentation')
@@ -223,18 +501,41 @@ class TrueFalseQuestion(QuizQuestion):
         setvar.text = '100'
         
         return item
-
+    
+    def _render_qti(self) -> bytes:
+        """Format the item from _TRUE_FALSE_ITEM_TEMPLATE instead of building its tree."""
+        # An empty question text serializes as a self-closing mattext, and a
+        # subclass may build a different item through either hook; all of
+        # these take the generic path
+        cls = type(self)
+        if (not self.question_text
+                or cls.populate_item is not TrueFalseQuestion.populate_item
+                or cls.to_qti_item is not QuizQuestion.to_qti_item):
+            return super()._render_qti()
+        return _TRUE_FALSE_ITEM_TEMPLATE.format(
+            ident_attr=escape_xml(self.identifier),
+            ident=_escape_text(self.identifier),
+            points=_escape_text(self._points_str),
+            true_id=_escape_text(self.true_id),
+            false_id=_escape_text(self.false_id),
+            true_id_attr=escape_xml(self.true_id),
+            false_id_attr=escape_xml(self.false_id),
+            correct_id=_escape_text(self.true_id if self.correct_answer else self.false_id),
+            question_text=_escape_text(self.question_text),
+        ).encode('utf-8')
 
 class FillInBlankQuestion(QuizQuestion):
     """Fill in the blank question - students enter short answer text."""
     
+    __slots__ = ('answers',)
+    
     def __init__(self, question_text: str, answers: List[str], points_possible: float = 1.0, identifier: Optional[str] = None):
         super().__init__(question_text, points_possible, identifier)
         self.answers = answers  # List of acceptable answers
         self.question_type = 'fill_in_multiple_blanks_question'
         
-    def to_qti_item(self) -> Element:
-        item = Element('item', ident=self.identifier, title="Question")
+    def populate_item(self, parent: Element) -> Element:
+        item = SubElement(parent, 'item', ident=self.identifier, title="Question")
         
         # Metadata
         itemmetadata = SubElement(item, 'itemmetadata')
@@ -242,15 +543,13 @@ class FillInBlankQuestion(QuizQuestion):
         
         metadata_fields = [
             ('question_type', self.question_type),
-            ('points_possible', str(self.points_possible)),
+            ('points_possible', self._points_str),
             ('original_answer_ids', ','.join(str(i) for i in range(len(self.answers)))),
-            ('assessment_question_identifierref', self._generate_question_id())
+            ('assessment_question_identifierref', self.identifier)
         ]
         
         for label, entry in metadata_fields:
-            qtimetadatafield = SubElement(qtimetadata, 'qtimetadatafield')
-            SubElement(qtimetadatafield, 'fieldlabel').text = label
-            SubElement(qtimetadatafield, 'fieldentry').text = entry
+            _add_meta(qtimetadata, label, entry)
         
         # Presentation
         presentation = SubElement(item, 'presentation')
@@ -284,13 +583,15 @@ class FillInBlankQuestion(QuizQuestion):
 class FillInMultipleBlanksQuestion(QuizQuestion):
     """Fill in multiple blanks - students fill in multiple blanks in text."""
     
+    __slots__ = ('blanks',)
+    
     def __init__(self, question_text: str, blanks: Dict[str, List[str]], points_possible: float = 1.0, identifier: Optional[str] = None):
         super().__init__(question_text, points_possible, identifier)
         self.blanks = blanks  # Dict of {variable_name: [acceptable_answers]}
         self.question_type = 'fill_in_multiple_blanks_question'
         
-    def to_qti_item(self) -> Element:
-        item = Element('item', ident=self.identifier, title="Question")
+    def populate_item(self, parent: Element) -> Element:
+        item = SubElement(parent, 'item', ident=self.identifier, title="Question")
         
         # Metadata
         itemmetadata = SubElement(item, 'itemmetadata')
@@ -298,14 +599,12 @@ class FillInMultipleBlanksQuestion(QuizQuestion):
         
         metadata_fields = [
             ('question_type', self.question_type),
-            ('points_possible', str(self.points_possible)),
-            ('assessment_question_identifierref', self._generate_question_id())
+            ('points_possible', self._points_str),
+            ('assessment_question_identifierref', self.identifier)
         ]
         
         for label, entry in metadata_fields:
-            qtimetadatafield = SubElement(qtimetadata, 'qtimetadatafield')
-            SubElement(qtimetadatafield, 'fieldlabel').text = label
-            SubElement(qtimetadatafield, 'fieldentry').text = entry
+            _add_meta(qtimetadata, label, entry)
         
         # Presentation
         presentation = SubElement(item, 'presentation')
@@ -325,7 +624,8 @@ class FillInMultipleBlanksQuestion(QuizQuestion):
         SubElement(outcomes, 'decvar', maxvalue='100', minvalue='0', 
                   varname='SCORE', vartype='Decimal')
         
-        # Add conditions for each blank
+        # Add conditions for each blank; each blank is worth an equal share
+        score = str(100 // max(len(self.blanks), 1))
         for var_name, answers in self.blanks.items():
             for answer in answers:
                 respcondition = SubElement(resprocessing, 'respcondition')
@@ -334,7 +634,7 @@ class FillInMultipleBlanksQuestion(QuizQuestion):
                 varequal = SubElement(conditionvar, 'varequal', respident=var_name)
                 varequal.text = answer
                 setvar = SubElement(respcondition, 'setvar', action='Set', varname='SCORE')
-                setvar.text = str(100 // len(self.blanks))
+                setvar.text = score
         
         return item
 
@@ -342,31 +642,35 @@ class FillInMultipleBlanksQuestion(QuizQuestion):
 class MultipleAnswersQuestion(QuizQuestion):
     """Multiple answers question - students can select multiple correct answers."""
     
+    __slots__ = ('answers',)
+    
     def __init__(self, question_text: str, answers: List[Dict[str, Any]], points_possible: float = 1.0, identifier: Optional[str] = None):
         super().__init__(question_text, points_possible, identifier)
         self.answers = answers  # List of dicts with 'text' and 'correct' keys
         self.question_type = 'multiple_answers_question'
         
-    def to_qti_item(self) -> Element:
-        item = Element('item', ident=self.identifier, title="Question")
+    def populate_item(self, parent: Element) -> Element:
+        # Answer columns, taken from the answers as they are now
+        answer_texts = [a['text'] for a in self.answers]
+        answer_correct = [bool(a.get('correct', False)) for a in self.answers]
+        
+        item = SubElement(parent, 'item', ident=self.identifier, title="Question")
         
         # Metadata
         itemmetadata = SubElement(item, 'itemmetadata')
         qtimetadata = SubElement(itemmetadata, 'qtimetadata')
         
-        answer_ids = [str(i) for i in range(len(self.answers))]
+        answer_ids = [str(i) for i in range(len(answer_texts))]
         
         metadata_fields = [
             ('question_type', self.question_type),
-            ('points_possible', str(self.points_possible)),
+            ('points_possible', self._points_str),
             ('original_answer_ids', ','.join(answer_ids)),
-            ('assessment_question_identifierref', self._generate_question_id())
+            ('assessment_question_identifierref', self.identifier)
         ]
         
         for label, entry in metadata_fields:
-            qtimetadatafield = SubElement(qtimetadata, 'qtimetadatafield')
-            SubElement(qtimetadatafield, 'fieldlabel').text = label
-            SubElement(qtimetadatafield, 'fieldentry').text = entry
+            _add_meta(qtimetadata, label, entry)
         
         # Presentation
         presentation = SubElement(item, 'presentation')
@@ -379,11 +683,7 @@ class MultipleAnswersQuestion(QuizQuestion):
                                   ident='response1', rcardinality='Multiple')
         render_choice = SubElement(response_lid, 'render_choice')
         
-        for i, answer in enumerate(self.answers):
-            response_label = SubElement(render_choice, 'response_label', ident=str(i))
-            material = SubElement(response_label, 'material')
-            mattext = SubElement(material, 'mattext', texttype='text/plain')
-            mattext.text = answer['text']
+        render_choice.extend(_response_labels(zip(answer_ids, answer_texts)))
         
         # Response processing
         resprocessing = SubElement(item, 'resprocessing')
@@ -392,7 +692,7 @@ class MultipleAnswersQuestion(QuizQuestion):
                   varname='SCORE', vartype='Decimal')
         
         # All correct answers must be selected
-        correct_ids = [str(i) for i, ans in enumerate(self.answers) if ans.get('correct', False)]
+        correct_ids = [answer_id for answer_id, correct in zip(answer_ids, answer_correct) if correct]
         
         respcondition = SubElement(resprocessing, 'respcondition')
         respcondition.set('continue', 'No')
@@ -412,13 +712,15 @@ class MultipleAnswersQuestion(QuizQuestion):
 class MultipleDropdownsQuestion(QuizQuestion):
     """Multiple dropdowns - students select from dropdowns embedded in text."""
     
+    __slots__ = ('dropdowns',)
+    
     def __init__(self, question_text: str, dropdowns: Dict[str, List[Dict[str, Any]]], points_possible: float = 1.0, identifier: Optional[str] = None):
         super().__init__(question_text, points_possible, identifier)
         self.dropdowns = dropdowns  # Dict of {variable_name: [{'text': str, 'correct': bool}]}
         self.question_type = 'multiple_dropdowns_question'
         
-    def to_qti_item(self) -> Element:
-        item = Element('item', ident=self.identifier, title="Question")
+    def populate_item(self, parent: Element) -> Element:
+        item = SubElement(parent, 'item', ident=self.identifier, title="Question")
         
         # Metadata
         itemmetadata = SubElement(item, 'itemmetadata')
@@ -426,14 +728,12 @@ class MultipleDropdownsQuestion(QuizQuestion):
         
         metadata_fields = [
             ('question_type', self.question_type),
-            ('points_possible', str(self.points_possible)),
-            ('assessment_question_identifierref', self._generate_question_id())
+            ('points_possible', self._points_str),
+            ('assessment_question_identifierref', self.identifier)
         ]
         
         for label, entry in metadata_fields:
-            qtimetadatafield = SubElement(qtimetadata, 'qtimetadatafield')
-            SubElement(qtimetadatafield, 'fieldlabel').text = label
-            SubElement(qtimetadatafield, 'fieldentry').text = entry
+            _add_meta(qtimetadata, label, entry)
         
         # Presentation
         presentation = SubElement(item, 'presentation')
@@ -447,11 +747,8 @@ class MultipleDropdownsQuestion(QuizQuestion):
                                      ident=f'response_{var_name}', rcardinality='Single')
             render_choice = SubElement(response_lid, 'render_choice')
             
-            for i, option in enumerate(options):
-                response_label = SubElement(render_choice, 'response_label', ident=f'{var_name}_{i}')
-                material = SubElement(response_label, 'material')
-                mattext = SubElement(material, 'mattext', texttype='text/plain')
-                mattext.text = option['text']
+            render_choice.extend(_response_labels(
+                (f'{var_name}_{i}', option['text']) for i, option in enumerate(options)))
         
         # Response processing
         resprocessing = SubElement(item, 'resprocessing')
@@ -459,7 +756,8 @@ class MultipleDropdownsQuestion(QuizQuestion):
         SubElement(outcomes, 'decvar', maxvalue='100', minvalue='0', 
                   varname='SCORE', vartype='Decimal')
         
-        # Add conditions for each dropdown
+        # Add conditions for each dropdown; each is worth an equal share
+        score = str(100 // max(len(self.dropdowns), 1))
         for var_name, options in self.dropdowns.items():
             correct_option = next((f'{var_name}_{i}' for i, opt in enumerate(options) 
                                  if opt.get('correct', False)), None)
@@ -470,7 +768,7 @@ class MultipleDropdownsQuestion(QuizQuestion):
                 varequal = SubElement(conditionvar, 'varequal', respident=f'response_{var_name}')
                 varequal.text = correct_option
                 setvar = SubElement(respcondition, 'setvar', action='Set', varname='SCORE')
-                setvar.text = str(100 // len(self.dropdowns))
+                setvar.text = score
         
         return item
 
@@ -478,6 +776,8 @@ class MultipleDropdownsQuestion(QuizQuestion):
 class MatchingQuestion(QuizQuestion):
     """Matching question - students match items from two columns."""
     
+    __slots__ = ('matches', 'distractors')
+    
     def __init__(self, question_text: str, matches: List[Dict[str, str]], 
                  distractors: List[str] = None, points_possible: float = 1.0, identifier: Optional[str] = None):
         super().__init__(question_text, points_possible, identifier)
@@ -485,8 +785,8 @@ class MatchingQuestion(QuizQuestion):
         self.distractors = distractors or []  # Extra answers that don't match
         self.question_type = 'matching_question'
         
-    def to_qti_item(self) -> Element:
-        item = Element('item', ident=self.identifier, title="Question")
+    def populate_item(self, parent: Element) -> Element:
+        item = SubElement(parent, 'item', ident=self.identifier, title="Question")
         
         # Metadata
         itemmetadata = SubElement(item, 'itemmetadata')
@@ -494,14 +794,12 @@ class MatchingQuestion(QuizQuestion):
         
         metadata_fields = [
             ('question_type', self.question_type),
-            ('points_possible', str(self.points_possible)),
-            ('assessment_question_identifierref', self._generate_question_id())
+            ('points_possible', self._points_str),
+            ('assessment_question_identifierref', self.identifier)
         ]
         
         for label, entry in metadata_fields:
-            qtimetadatafield = SubElement(qtimetadata, 'qtimetadatafield')
-            SubElement(qtimetadatafield, 'fieldlabel').text = label
-            SubElement(qtimetadatafield, 'fieldentry').text = entry
+            _add_meta(qtimetadata, label, entry)
         
         # Presentation
         presentation = SubElement(item, 'presentation')
@@ -509,19 +807,21 @@ class MatchingQuestion(QuizQuestion):
         mattext = SubElement(material, 'mattext', texttype='text/html')
         mattext.text = self.question_text
         
-        # Response group
+        # All possible answers (correct + distractors), offered for every prompt;
+        # duplicates resolve to their first position
+        all_answers = [m['answer'] for m in self.matches] + self.distractors
+        answer_index: Dict[str, int] = {}
+        for j, answer in enumerate(all_answers):
+            answer_index.setdefault(answer, j)
+        
+        # Response group; every prompt repeats the full answer list. The
+        # (ident, text) pairs are formatted once, but each group gets its
+        # own label elements so no subtree is shared between groups.
+        answer_choices = [(f'answer_{j}', answer) for j, answer in enumerate(all_answers)]
         for i, match in enumerate(self.matches):
             response_grp = SubElement(presentation, 'response_grp', 
                                      ident=f'response_{i}', rcardinality='Single')
-            render_choice = SubElement(response_grp, 'render_choice')
-            
-            # Add all possible answers (correct + distractors)
-            all_answers = [m['answer'] for m in self.matches] + self.distractors
-            for j, answer in enumerate(all_answers):
-                response_label = SubElement(render_choice, 'response_label', ident=f'answer_{j}')
-                material = SubElement(response_label, 'material')
-                mattext = SubElement(material, 'mattext', texttype='text/plain')
-                mattext.text = answer
+            SubElement(response_grp, 'render_choice').extend(_response_labels(answer_choices))
             
             # Add the prompt
             material = SubElement(response_grp, 'material')
@@ -534,17 +834,17 @@ class MatchingQuestion(QuizQuestion):
         SubElement(outcomes, 'decvar', maxvalue='100', minvalue='0', 
                   varname='SCORE', vartype='Decimal')
         
-        # Add conditions for each match
-        all_answers = [m['answer'] for m in self.matches] + self.distractors
+        # Add conditions for each match; each is worth an equal share
+        score = str(100 // max(len(self.matches), 1))
         for i, match in enumerate(self.matches):
-            correct_answer_idx = all_answers.index(match['answer'])
+            correct_answer_idx = answer_index[match['answer']]
             respcondition = SubElement(resprocessing, 'respcondition')
             respcondition.set('continue', 'Yes')
             conditionvar = SubElement(respcondition, 'conditionvar')
             varequal = SubElement(conditionvar, 'varequal', respident=f'response_{i}')
             varequal.text = f'answer_{correct_answer_idx}'
             setvar = SubElement(respcondition, 'setvar', action='Set', varname='SCORE')
-            setvar.text = str(100 // len(self.matches))
+            setvar.text = score
         
         return item
 
@@ -552,6 +852,8 @@ class MatchingQuestion(QuizQuestion):
 class NumericalAnswerQuestion(QuizQuestion):
     """Numerical answer question - students enter a number within a range."""
     
+    __slots__ = ('exact_answer', 'answer_range', 'margin')
+    
     def __init__(self, question_text: str, exact_answer: Optional[float] = None,
                  answer_range: Optional[Tuple[float, float]] = None, 
                  margin: float = 0.0, points_possible: float = 1.0, identifier: Optional[str] = None):
@@ -561,8 +863,8 @@ class NumericalAnswerQuestion(QuizQuestion):
         self.margin = margin
         self.question_type = 'numerical_question'
         
-    def to_qti_item(self) -> Element:
-        item = Element('item', ident=self.identifier, title="Question")
+    def populate_item(self, parent: Element) -> Element:
+        item = SubElement(parent, 'item', ident=self.identifier, title="Question")
         
         # Metadata
         itemmetadata = SubElement(item, 'itemmetadata')
@@ -570,14 +872,12 @@ class NumericalAnswerQuestion(QuizQuestion):
         
         metadata_fields = [
             ('question_type', self.question_type),
-            ('points_possible', str(self.points_possible)),
-            ('assessment_question_identifierref', self._generate_question_id())
+            ('points_possible', self._points_str),
+            ('assessment_question_identifierref', self.identifier)
         ]
         
         for label, entry in metadata_fields:
-            qtimetadatafield = SubElement(qtimetadata, 'qtimetadatafield')
-            SubElement(qtimetadatafield, 'fieldlabel').text = label
-            SubElement(qtimetadatafield, 'fieldentry').text = entry
+            _add_meta(qtimetadata, label, entry)
         
         # Presentation
         presentation = SubElement(item, 'presentation')
@@ -626,6 +926,8 @@ class NumericalAnswerQuestion(QuizQuestion):
 class FormulaQuestion(QuizQuestion):
     """Formula question - answer is calculated from variables."""
     
+    __slots__ = ('formula', 'variables', 'tolerance')
+    
     def __init__(self, question_text: str, formula: str, 
                  variables: Dict[str, Tuple[float, float]], 
                  tolerance: float = 0.01, points_possible: float = 1.0, identifier: Optional[str] = None):
@@ -635,8 +937,8 @@ class FormulaQuestion(QuizQuestion):
         self.tolerance = tolerance
         self.question_type = 'calculated_question'
         
-    def to_qti_item(self) -> Element:
-        item = Element('item', ident=self.identifier, title="Question")
+    def populate_item(self, parent: Element) -> Element:
+        item = SubElement(parent, 'item', ident=self.identifier, title="Question")
         
         # Metadata
         itemmetadata = SubElement(item, 'itemmetadata')
@@ -644,28 +946,19 @@ class FormulaQuestion(QuizQuestion):
         
         metadata_fields = [
             ('question_type', self.question_type),
-            ('points_possible', str(self.points_possible)),
-            ('assessment_question_identifierref', self._generate_question_id())
+            ('points_possible', self._points_str),
+            ('assessment_question_identifierref', self.identifier)
         ]
         
         for label, entry in metadata_fields:
-            qtimetadatafield = SubElement(qtimetadata, 'qtimetadatafield')
-            SubElement(qtimetadatafield, 'fieldlabel').text = label
-            SubElement(qtimetadatafield, 'fieldentry').text = entry
+            _add_meta(qtimetadata, label, entry)
         
         # Add formula and variable metadata
-        qtimetadatafield = SubElement(qtimetadata, 'qtimetadatafield')
-        SubElement(qtimetadatafield, 'fieldlabel').text = 'formula_question_formula'
-        SubElement(qtimetadatafield, 'fieldentry').text = self.formula
+        _add_meta(qtimetadata, 'formula_question_formula', self.formula)
         
         for var_name, (min_val, max_val) in self.variables.items():
-            qtimetadatafield = SubElement(qtimetadata, 'qtimetadatafield')
-            SubElement(qtimetadatafield, 'fieldlabel').text = f'formula_variable_{var_name}_min'
-            SubElement(qtimetadatafield, 'fieldentry').text = str(min_val)
-            
-            qtimetadatafield = SubElement(qtimetadata, 'qtimetadatafield')
-            SubElement(qtimetadatafield, 'fieldlabel').text = f'formula_variable_{var_name}_max'
-            SubElement(qtimetadatafield, 'fieldentry').text = str(max_val)
+            _add_meta(qtimetadata, f'formula_variable_{var_name}_min', str(min_val))
+            _add_meta(qtimetadata, f'formula_variable_{var_name}_max', str(max_val))
         
         # Presentation
         presentation = SubElement(item, 'presentation')
@@ -689,12 +982,14 @@ class FormulaQuestion(QuizQuestion):
 class EssayQuestion(QuizQuestion):
     """Essay question - students write long-form text answer."""
     
+    __slots__ = ()
+    
     def __init__(self, question_text: str, points_possible: float = 1.0, identifier: Optional[str] = None):
         super().__init__(question_text, points_possible, identifier)
         self.question_type = 'essay_question'
         
-    def to_qti_item(self) -> Element:
-        item = Element('item', ident=self.identifier, title="Question")
+    def populate_item(self, parent: Element) -> Element:
+        item = SubElement(parent, 'item', ident=self.identifier, title="Question")
         
         # Metadata
         itemmetadata = SubElement(item, 'itemmetadata')
@@ -702,14 +997,12 @@ class EssayQuestion(QuizQuestion):
         
         metadata_fields = [
             ('question_type', self.question_type),
-            ('points_possible', str(self.points_possible)),
-            ('assessment_question_identifierref', self._generate_question_id())
+            ('points_possible', self._points_str),
+            ('assessment_question_identifierref', self.identifier)
         ]
         
         for label, entry in metadata_fields:
-            qtimetadatafield = SubElement(qtimetadata, 'qtimetadatafield')
-            SubElement(qtimetadatafield, 'fieldlabel').text = label
-            SubElement(qtimetadatafield, 'fieldentry').text = entry
+            _add_meta(qtimetadata, label, entry)
         
         # Presentation
         presentation = SubElement(item, 'presentation')
@@ -733,12 +1026,14 @@ class EssayQuestion(QuizQuestion):
 class FileUploadQuestion(QuizQuestion):
     """File upload question - students upload a file as their answer."""
     
+    __slots__ = ()
+    
     def __init__(self, question_text: str, points_possible: float = 1.0, identifier: Optional[str] = None):
         super().__init__(question_text, points_possible, identifier)
         self.question_type = 'file_upload_question'
         
-    def to_qti_item(self) -> Element:
-        item = Element('item', ident=self.identifier, title="Question")
+    def populate_item(self, parent: Element) -> Element:
+        item = SubElement(parent, 'item', ident=self.identifier, title="Question")
         
         # Metadata
         itemmetadata = SubElement(item, 'itemmetadata')
@@ -746,14 +1041,12 @@ class FileUploadQuestion(QuizQuestion):
         
         metadata_fields = [
             ('question_type', self.question_type),
-            ('points_possible', str(self.points_possible)),
-            ('assessment_question_identifierref', self._generate_question_id())
+            ('points_possible', self._points_str),
+            ('assessment_question_identifierref', self.identifier)
         ]
         
         for label, entry in metadata_fields:
-            qtimetadatafield = SubElement(qtimetadata, 'qtimetadatafield')
-            SubElement(qtimetadatafield, 'fieldlabel').text = label
-            SubElement(qtimetadatafield, 'fieldentry').text = entry
+            _add_meta(qtimetadata, label, entry)
         
         # Presentation
         presentation = SubElement(item, 'presentation')
@@ -777,12 +1070,14 @@ class FileUploadQuestion(QuizQuestion):
 class TextOnlyQuestion(QuizQuestion):
     """Text-only question - displays information without requiring an answer."""
     
+    __slots__ = ()
+    
     def __init__(self, question_text: str, identifier: Optional[str] = None):
         super().__init__(question_text, 0.0, identifier)
         self.question_type = 'text_only_question'
         
-    def to_qti_item(self) -> Element:
-        item = Element('item', ident=self.identifier, title="Question")
+    def populate_item(self, parent: Element) -> Element:
+        item = SubElement(parent, 'item', ident=self.identifier, title="Question")
         
         # Metadata
         itemmetadata = SubElement(item, 'itemmetadata')
@@ -791,13 +1086,11 @@ class TextOnlyQuestion(QuizQuestion):
         metadata_fields = [
             ('question_type', self.question_type),
             ('points_possible', '0.0'),
-            ('assessment_question_identifierref', self._generate_question_id())
+            ('assessment_question_identifierref', self.identifier)
         ]
         
         for label, entry in metadata_fields:
-            qtimetadatafield = SubElement(qtimetadata, 'qtimetadatafield')
-            SubElement(qtimetadatafield, 'fieldlabel').text = label
-            SubElement(qtimetadatafield, 'fieldentry').text = entry
+            _add_meta(qtimetadata, label, entry)
         
         # Presentation - only displays text, no response needed
         presentation = SubElement(item, 'presentation')
@@ -910,149 +1203,79 @@ class Quiz:
     
     def to_assessment_meta_xml(self) -> str:
         """Generate assessment_meta.xml content."""
-        quiz_elem = Element('quiz')
-        quiz_elem.set('xmlns', 'http://canvas.instructure.com/xsd/cccv1p0')
-        quiz_elem.set('xmlns:xsi', 'http://www.w3.org/2001/XMLSchema-instance')
-        quiz_elem.set('xsi:schemaLocation', 'http://canvas.instructure.com/xsd/cccv1p0 https://canvas.instructure.com/xsd/cccv1p0.xsd')
-        quiz_elem.set('identifier', self.identifier)
-        
-        SubElement(quiz_elem, 'title').text = self.title
-        SubElement(quiz_elem, 'description').text = self.description
-        SubElement(quiz_elem, 'due_at').text = self.due_at
-        SubElement(quiz_elem, 'lock_at').text = self.lock_at
-        SubElement(quiz_elem, 'unlock_at').text = self.unlock_at
-        SubElement(quiz_elem, 'shuffle_questions').text = str(self.shuffle_questions).lower()
-        SubElement(quiz_elem, 'shuffle_answers').text = str(self.shuffle_answers).lower()
-        SubElement(quiz_elem, 'calculator_type').text = self.calculator_type
-        SubElement(quiz_elem, 'scoring_policy').text = self.scoring_policy
-        SubElement(quiz_elem, 'hide_results').text = self.hide_results
-        SubElement(quiz_elem, 'quiz_type').text = self.quiz_type
-        SubElement(quiz_elem, 'points_possible').text = str(self.points_possible)
-        SubElement(quiz_elem, 'require_lockdown_browser').text = str(self.require_lockdown_browser).lower()
-        SubElement(quiz_elem, 'require_lockdown_browser_for_results').text = 'false'
-        SubElement(quiz_elem, 'require_lockdown_browser_monitor').text = 'false'
-        SubElement(quiz_elem, 'lockdown_browser_monitor_data')
-        SubElement(quiz_elem, 'show_correct_answers').text = str(self.show_correct_answers).lower()
-        SubElement(quiz_elem, 'anonymous_submissions').text = str(self.anonymous_submissions).lower()
-        SubElement(quiz_elem, 'could_be_locked').text = str(self.could_be_locked).lower()
-        SubElement(quiz_elem, 'disable_timer_autosubmission').text = 'false'
-        SubElement(quiz_elem, 'allowed_attempts').text = str(self.allowed_attempts)
-        SubElement(quiz_elem, 'build_on_last_attempt').text = 'false'
-        SubElement(quiz_elem, 'one_question_at_a_time').text = str(self.one_question_at_a_time).lower()
-        SubElement(quiz_elem, 'cant_go_back').text = str(self.cant_go_back).lower()
-        SubElement(quiz_elem, 'available').text = 'false'
-        SubElement(quiz_elem, 'one_time_results').text = 'false'
-        SubElement(quiz_elem, 'show_correct_answers_last_attempt').text = 'false'
-        SubElement(quiz_elem, 'only_visible_to_overrides').text = 'false'
-        SubElement(quiz_elem, 'module_locked').text = 'false'
-        SubElement(quiz_elem, 'allow_clear_mc_selection')
-        SubElement(quiz_elem, 'disable_document_access').text = 'false'
-        SubElement(quiz_elem, 'result_view_restricted').text = 'false'
-        
-        # Embedded assignment
-        assignment = SubElement(quiz_elem, 'assignment', identifier=generate_identifier())
-        SubElement(assignment, 'title').text = self.title
-        SubElement(assignment, 'due_at').text = self.due_at
-        SubElement(assignment, 'lock_at').text = self.lock_at
-        SubElement(assignment, 'unlock_at').text = self.unlock_at
-        SubElement(assignment, 'module_locked').text = 'false'
-        SubElement(assignment, 'workflow_state').text = self.workflow_state
-        SubElement(assignment, 'assignment_overrides')
-        SubElement(assignment, 'assignment_overrides')
-        SubElement(assignment, 'quiz_identifierref').text = self.identifier
-        SubElement(assignment, 'allowed_extensions')
-        SubElement(assignment, 'has_group_category').text = 'false'
-        SubElement(assignment, 'points_possible').text = str(self.points_possible)
-        SubElement(assignment, 'grading_type').text = 'points'
-        SubElement(assignment, 'all_day').text = 'false'
-        SubElement(assignment, 'submission_types').text = 'online_quiz'
-        SubElement(assignment, 'position').text = '1'
-        SubElement(assignment, 'turnitin_enabled').text = 'false'
-        SubElement(assignment, 'vericite_enabled').text = 'false'
-        SubElement(assignment, 'peer_review_count').text = '0'
-        SubElement(assignment, 'peer_reviews').text = 'false'
-        SubElement(assignment, 'automatic_peer_reviews').text = 'false'
-        SubElement(assignment, 'anonymous_peer_reviews').text = 'false'
-        SubElement(assignment, 'grade_group_students_individually').text = 'false'
-        SubElement(assignment, 'freeze_on_copy').text = 'false'
-        SubElement(assignment, 'omit_from_final_grade').text = 'false'
-        SubElement(assignment, 'intra_group_peer_reviews').text = 'false'
-        SubElement(assignment, 'only_visible_to_overrides').text = 'false'
-        SubElement(assignment, 'post_to_sis').text = 'false'
-        SubElement(assignment, 'moderated_grading').text = 'false'
-        SubElement(assignment, 'grader_count').text = '0'
-        SubElement(assignment, 'grader_comments_visible_to_graders').text = 'true'
-        SubElement(assignment, 'anonymous_grading').text = 'false'
-        SubElement(assignment, 'graders_anonymous_to_graders').text = 'false'
-        SubElement(assignment, 'grader_names_visible_to_final_grader').text = 'true'
-        SubElement(assignment, 'anonymous_instructor_annotations').text = 'false'
-        
-        post_policy = SubElement(assignment, 'post_policy')
-        SubElement(post_policy, 'post_manually').text = 'false'
-        
+        group_ref = ''
         if self.assignment_group_identifierref:
-            SubElement(assignment, 'assignment_group_identifierref').text = self.assignment_group_identifierref
-        
-        SubElement(assignment, 'assignment_overrides')
-        
-        rough_string = tostring(quiz_elem, encoding='UTF-8')
-        reparsed = minidom.parseString(rough_string)
-        return reparsed.toprettyxml(indent="  ", encoding='UTF-8').decode('utf-8')
+            group_ref = '\n    ' + text_element('assignment_group_identifierref', self.assignment_group_identifierref)
+        points_possible = str(self.points_possible)
+        title = text_element('title', self.title)
+        due_at = text_element('due_at', self.due_at)
+        lock_at = text_element('lock_at', self.lock_at)
+        unlock_at = text_element('unlock_at', self.unlock_at)
+        
+        return _ASSESSMENT_META_TEMPLATE.format(
+            identifier=escape_xml(self.identifier),
+            title=title,
+            description=text_element('description', self.description),
+            due_at=due_at,
+            lock_at=lock_at,
+            unlock_at=unlock_at,
+            shuffle_questions=_bool_text(self.shuffle_questions),
+            shuffle_answers=_bool_text(self.shuffle_answers),
+            calculator_type=text_element('calculator_type', self.calculator_type),
+            scoring_policy=text_element('scoring_policy', self.scoring_policy),
+            hide_results=text_element('hide_results', self.hide_results),
+            quiz_type=text_element('quiz_type', self.quiz_type),
+            points_possible=points_possible,
+            require_lockdown_browser=_bool_text(self.require_lockdown_browser),
+            show_correct_answers=_bool_text(self.show_correct_answers),
+            anonymous_submissions=_bool_text(self.anonymous_submissions),
+            could_be_locked=_bool_text(self.could_be_locked),
+            allowed_attempts=self.allowed_attempts,
+            one_question_at_a_time=_bool_text(self.one_question_at_a_time),
+            cant_go_back=_bool_text(self.cant_go_back),
+            assignment_identifier=generate_identifier(),
+            workflow_state=text_element('workflow_state', self.workflow_state),
+            group_ref=group_ref,
+        )
     
     def to_assessment_qti_xml(self) -> str:
         """Generate assessment_qti.xml (QTI shell/reference file)."""
-        root = Element('questestinterop')
-        root.set('xmlns', 'http://www.imsglobal.org/xsd/ims_qtiasiv1p2')
-        root.set('xmlns:xsi', 'http://www.w3.org/2001/XMLSchema-instance')
-        root.set('xsi:schemaLocation', 'http://www.imsglobal.org/xsd/ims_qtiasiv1p2 http://www.imsglobal.org/profile/cc/ccv1p1/ccv1p1_qtiasiv1p2p1_v1p0.xsd')
-        
-        assessment = SubElement(root, 'assessment', ident=self.identifier, title="Question")
-        
-        qtimetadata = SubElement(assessment, 'qtimetadata')
-        
-        field = SubElement(qtimetadata, 'qtimetadatafield')
-        SubElement(field, 'fieldlabel').text = 'cc_profile'
-        SubElement(field, 'fieldentry').text = 'cc.exam.v0p1'
-        
-        field = SubElement(qtimetadata, 'qtimetadatafield')
-        SubElement(field, 'fieldlabel').text = 'qmd_assessmenttype'
-        SubElement(field, 'fieldentry').text = 'Examination'
-        
-        field = SubElement(qtimetadata, 'qtimetadatafield')
-        SubElement(field, 'fieldlabel').text = 'qmd_scoretype'
-        SubElement(field, 'fieldentry').text = 'Percentage'
-        
-        field = SubElement(qtimetadata, 'qtimetadatafield')
-        SubElement(field, 'fieldlabel').text = 'cc_maxattempts'
-        SubElement(field, 'fieldentry').text = str(self.allowed_attempts)
-        
-        SubElement(assessment, 'section', ident='root_section')
-        
-        rough_string = tostring(root, encoding='UTF-8')
-        reparsed = minidom.parseString(rough_string)
-        return reparsed.toprettyxml(indent="  ", encoding='UTF-8').decode('utf-8')
+        return _ASSESSMENT_QTI_SHELL_TEMPLATE.format(
+            identifier=escape_xml(self.identifier),
+            allowed_attempts=escape_xml(str(self.allowed_attempts)),
+        )
     
     def to_qti_xml(self) -> str:
         """Generate full QTI XML with all questions."""
-        root = Element('questestinterop')
-        root.set('xmlns', 'http://www.imsglobal.org/xsd/ims_qtiasiv1p2')
-        root.set('xmlns:xsi', 'http://www.w3.org/2001/XMLSchema-instance')
-        root.set('xsi:schemaLocation', 'http://www.imsglobal.org/xsd/ims_qtiasiv1p2 http://www.imsglobal.org/xsd/ims_qtiasiv1p2p1.xsd')
-        
-        assessment = SubElement(root, 'assessment', ident=self.identifier, title="Question")
-        
-        # Add metadata
-        qtimetadata = SubElement(assessment, 'qtimetadata')
-        field = SubElement(qtimetadata, 'qtimetadatafield')
-        SubElement(field, 'fieldlabel').text = 'cc_maxattempts'
-        SubElement(field, 'fieldentry').text = str(self.allowed_attempts)
-        
-        # Add section with questions
-        section = SubElement(assessment, 'section', ident='root_section')
+        buffer = io.BytesIO()
+        self.write_qti_xml(buffer)
+        return buffer.getvalue().decode('utf-8')
+    
+    def write_qti_xml(self, fileobj) -> None:
+        """
+        Write full QTI XML with all questions to a binary file object.
         
-        for question in self.questions:
-            section.append(question.to_qti_item())
+        Questions are serialized one item at a time, so only a single
+        question's element tree is alive while the document is written to
+        fileobj (e.g. an entry opened with ZipFile.open(name, 'w')).
         
-        rough_string = tostring(root, encoding='UTF-8')
-        reparsed = minidom.parseString(rough_string)
-        return reparsed.toprettyxml(indent="  ", encoding='UTF-8').decode('utf-8')
+        Args:
+            fileobj: Writable binary file object
+        """
+        write = fileobj.write
+        write(_QTI_PROLOG)
+        write(_QTI_ASSESSMENT_HEAD_TEMPLATE.format(
+            identifier=escape_xml(self.identifier),
+            allowed_attempts=self.allowed_attempts,
+        ).encode('utf-8'))
+        
+        if not self.questions:
+            write(_QTI_EMPTY_SECTION)
+        else:
+            write(_QTI_SECTION_OPEN)
+            for question in self.questions:
+                write(_QTI_ITEM_INDENT)
+                write(question.qti_bytes)
+            write(_QTI_SECTION_CLOSE)
+        
+        write(_QTI_EPILOG)
@@ -2,11 +2,43 @@
 
 import os
 import shutil
-from pathlib import Path
-from typing import Optional
+import zipfile
+from typing import Iterator, Optional
 from .utils import generate_identifier
 
 
+# File types that are stored rather than deflated in the package
+_STORED_EXTENSIONS = frozenset({
+    '.jpg', '.jpeg', '.png', '.gif', '.webp',
+    '.mp3', '.mp4', '.m4a', '.m4v', '.mov', '.webm', '.ogg',
+    '.pdf', '.zip', '.gz', '.bz2', '.xz', '.7z',
+    '.docx', '.xlsx', '.pptx',
+})
+
+# Chunk size for copying course files into the package
+_COPY_BUFSIZE = 1024 * 1024
+
+
+def _iter_files(directory: str) -> Iterator[str]:
+    """
+    Yield the paths of all files below a directory, depth first.
+    
+    Uses os.scandir so file types come from the directory listing instead
+    of a stat call per entry. Symlinked directories are not descended into.
+    """
+    stack = [directory]
+    while stack:
+        subdirs = []
+        with os.scandir(stack.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir() and not entry.is_symlink():
+                    subdirs.append(entry.path)
+                elif entry.is_file():
+                    yield entry.path
+        # Visit subdirectories in listing order
+        stack.extend(reversed(subdirs))
+
+
 class FileResource:
     """Represents a file/web resource to be included in the IMSCC package."""
     
@@ -96,17 +128,15 @@ class FileManager:
             List of created FileResources
         """
         added_files = []
-        dir_path = Path(directory)
         
-        for file_path in dir_path.rglob('*'):
-            if file_path.is_file():
-                # Calculate relative path
-                rel_path = file_path.relative_to(dir_path)
-                dest_path = f"{destination_prefix}/{rel_path}"
-                
-                resource = FileResource(str(file_path), dest_path)
-                self.files.append(resource)
-                added_files.append(resource)
+        for file_path in _iter_files(directory):
+            # Calculate relative path
+            rel_path = os.path.relpath(file_path, directory)
+            dest_path = f"{destination_prefix}/{rel_path}"
+            
+            resource = FileResource(file_path, dest_path)
+            self.files.append(resource)
+            added_files.append(resource)
         
         return added_files
     
@@ -119,3 +149,32 @@ class FileManager:
         """
         for file_resource in self.files:
             file_resource.copy_to(target_dir)
+    
+    def write_to_zip(self, zipf: zipfile.ZipFile) -> None:
+        """
+        Write all managed files into an open zip archive.
+        
+        A later file with the same destination replaces an earlier one,
+        as it would when copying to a directory.
+        
+        Args:
+            zipf: ZipFile opened for writing
+        """
+        arcnames = {}
+        for file_resource in self.files:
+            arcname = file_resource.destination_path.replace(os.sep, '/')
+            arcnames[arcname] = file_resource.filepath
+        
+        for arcname, filepath in arcnames.items():
+            zinfo = zipfile.ZipInfo.from_file(filepath, arcname)
+            # Media and archives are already compressed; deflating them
+            # again costs time without saving space
+            if os.path.splitext(arcname)[1].lower() in _STORED_EXTENSIONS:
+                zinfo.compress_type = zipfile.ZIP_STORED
+            else:
+                zinfo.compress_type = zipf.compression
+            
+            # ZipFile.write copies in 8 KiB chunks; use larger reads so big
+            # media files take fewer read/compress/write round trips
+            with open(filepath, 'rb') as src, zipf.open(zinfo, 'w') as dest:
+                shutil.copyfileobj(src, dest, _COPY_BUFSIZE)
@@ -2,10 +2,14 @@
 
 import uuid
 import zipfile
-import os
 import re
 from pathlib import Path
 from typing import Optional
+from xml.etree.ElementTree import Element, ElementTree, indent, tostring
+
+
+XML_DECLARATION = '<?xml version="1.0" encoding="UTF-8"?>\n'
+_XML_DECLARATION_BYTES = XML_DECLARATION.encode('utf-8')
 
 
 def generate_identifier(prefix: str = "g") -> str:
@@ -23,6 +27,77 @@ def generate_identifier(prefix: str = "g") -> str:
     return f"{prefix}{unique_id}"
 
 
+def escape_xml(text: str) -> str:
+    """
+    Escape text for use as XML element content or an attribute value.
+    
+    Escapes &, <, > and double quotes. Most titles contain none of these,
+    so such strings are returned unchanged without calling the escaper.
+    
+    Args:
+        text: Text to escape
+    
+    Returns:
+        Escaped text
+    """
+    if '&' not in text and '<' not in text and '>' not in text and '"' not in text:
+        return text
+    # Same replacements as xml.sax.saxutils.escape(text, {'"': '&quot;'}),
+    # whose module pulls in urllib and the email package on import
+    return (text.replace('&', '&amp;').replace('>', '&gt;')
+            .replace('<', '&lt;').replace('"', '&quot;'))
+
+
+def text_element(tag: str, text: Optional[str]) -> str:
+    """
+    Render a text-only XML element for a string template.
+    
+    Args:
+        tag: Element name
+        text: Element text; escaped with escape_xml()
+    
+    Returns:
+        '<tag>text</tag>', or '<tag/>' when text is empty or None
+    """
+    if not text:
+        return f'<{tag}/>'
+    return f'<{tag}>{escape_xml(text)}</{tag}>'
+
+
+def to_pretty_xml(elem: Element) -> str:
+    """
+    Serialize an element as an indented XML document.
+    
+    The tree is indented in place and serialized once, with a UTF-8
+    declaration and two-space indentation, without a minidom reparse.
+    
+    Args:
+        elem: Root element of the document
+    
+    Returns:
+        XML document as a string
+    """
+    indent(elem, space="  ")
+    return XML_DECLARATION + tostring(elem, encoding='unicode') + '\n'
+
+
+def write_pretty_xml(elem: Element, fileobj) -> None:
+    """
+    Write an element as an indented XML document to a binary file object.
+    
+    Produces the same document as to_pretty_xml, but streams it into
+    fileobj instead of building the whole string in memory.
+    
+    Args:
+        elem: Root element of the document
+        fileobj: Writable binary file object (e.g. from ZipFile.open)
+    """
+    indent(elem, space="  ")
+    fileobj.write(_XML_DECLARATION_BYTES)
+    ElementTree(elem).write(fileobj, encoding='utf-8')
+    fileobj.write(b'\n')
+
+
 def extract_imscc(imscc_path: str, output_dir: str) -> None:
     """
     Extract an IMSCC file to a directory for inspection/templating.
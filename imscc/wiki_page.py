@@ -1,9 +1,52 @@
 """WikiPage class for IMSCC package."""
 
+import re
 from typing import Optional
 from .utils import generate_identifier, sanitize_filename
 
 
+_TITLE_RE = re.compile(r'<title>(.*?)</title>', re.IGNORECASE)
+_BODY_RE = re.compile(r'<body>(.*?)</body>', re.DOTALL | re.IGNORECASE)
+_BODY_END_RE = re.compile(r'</body>', re.IGNORECASE)
+
+_READ_CHUNK_SIZE = 64 * 1024
+
+# Page markup around the content; the head is filled in per page
+_HTML_HEAD_TEMPLATE = """<html>
+<head>
+<meta http-equiv="Content-Type" content="text/html; charset=utf-8"/>
+<title>{title}</title>
+<meta name="identifier" content="{identifier}"/>
+<meta name="editing_roles" content="{editing_roles}"/>
+<meta name="workflow_state" content="{workflow_state}"/>
+{front_page_meta}
+{previous_head}
+</head>
+<body>
+"""
+_FRONT_PAGE_META = '<meta name="front_page" content="true"/>\n'
+_HTML_TAIL = """
+</body>
+</html>"""
+_HTML_TAIL_BYTES = _HTML_TAIL.encode('utf-8')
+
+
+def _read_through_body(f) -> str:
+    """Read a text file up to the chunk holding the first </body>, or to EOF."""
+    parts = []
+    tail = ''
+    while True:
+        chunk = f.read(_READ_CHUNK_SIZE)
+        if not chunk:
+            break
+        parts.append(chunk)
+        # The tag may straddle two chunks, so also look across the boundary
+        if _BODY_END_RE.search(chunk) or _BODY_END_RE.search(tail + chunk[:6]):
+            break
+        tail = chunk[-6:]
+    return ''.join(parts)
+
+
 class WikiPage:
     """Represents a Canvas wiki page."""
     
@@ -42,6 +85,17 @@ class WikiPage:
         """Get the filename for this page."""
         return self._filename
     
+    def _html_head(self) -> str:
+        """Render the page up to and including the opening body tag."""
+        return _HTML_HEAD_TEMPLATE.format(
+            title=self.title,
+            identifier=self.identifier,
+            editing_roles=self.editing_roles,
+            workflow_state=self.workflow_state,
+            front_page_meta=_FRONT_PAGE_META if self.is_front_page else '',
+            previous_head=self.previous_head,
+        )
+    
     def to_html(self) -> str:
         """
         Generate the HTML file content for this page.
@@ -49,22 +103,22 @@ class WikiPage:
         Returns:
             Complete HTML content with metadata
         """
-        previous_head = self.previous_head
-        front_page_meta = '<meta name="front_page" content="true"/>\n' if self.is_front_page else ''
-        return f"""<html>
-<head>
-<meta http-equiv="Content-Type" content="text/html; charset=utf-8"/>
-<title>{self.title}</title>
-<meta name="identifier" content="{self.identifier}"/>
-<meta name="editing_roles" content="{self.editing_roles}"/>
-<meta name="workflow_state" content="{self.workflow_state}"/>
-{front_page_meta}
-{previous_head}
-</head>
-<body>
-{self.content}
-</body>
-</html>"""
+        return self._html_head() + self.content + _HTML_TAIL
+    
+    def write_html(self, fileobj) -> None:
+        """
+        Write the HTML file content for this page to a binary file object.
+        
+        Same output as to_html(), but the page content is written as its
+        own piece instead of being copied into one large string first.
+        
+        Args:
+            fileobj: Writable binary file object
+        """
+        write = fileobj.write
+        write(self._html_head().encode('utf-8'))
+        write(self.content.encode('utf-8'))
+        write(_HTML_TAIL_BYTES)
     
     @classmethod
     def from_file(cls, filepath: str, title: Optional[str] = None) -> "WikiPage":
@@ -78,20 +132,23 @@ class WikiPage:
         Returns:
             WikiPage instance
         """
+        # Anything after </body> is discarded, so stop reading there unless
+        # the title or body still have to be found further on
         with open(filepath, 'r', encoding='utf-8') as f:
-            content = f.read()
+            content = _read_through_body(f)
+            if _BODY_RE.search(content) is None or (title is None and _TITLE_RE.search(content) is None):
+                content += f.read()
         
         # Try to extract title from HTML if not provided
         if title is None:
-            import re
-            title_match = re.search(r'<title>(.*?)</title>', content, re.IGNORECASE)
+            title_match = _TITLE_RE.search(content)
             if title_match:
                 title = title_match.group(1)
             else:
                 title = filepath.split('/')[-1].replace('.html', '').replace('-', ' ').title()
         
         # Extract just the body content if it's a full HTML document
-        body_match = re.search(r'<body>(.*?)</body>', content, re.DOTALL | re.IGNORECASE)
+        body_match = _BODY_RE.search(content)
         if body_match:
             content = body_match.group(1).strip()
         
@@ -3,7 +3,7 @@
 Extract an IMSCC file and convert it to a locally editable template.
 
 This script:
-1. Extracts the IMSCC (ZIP) file
+1. Reads the IMSCC (ZIP) file in place, without a scratch extraction
 2. Parses imsmanifest.xml and course settings
 3. Converts Canvas links back to local format:
    - $IMS-CC-FILEBASE$/web_resources/file.txt → ../web_resources/file.txt
@@ -21,84 +21,204 @@ import sys
 import json
 import re
 import argparse
+import tempfile
 import zipfile
 import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 
-def extract_imscc(imscc_path, temp_dir):
-    """Extract IMSCC file to temporary directory."""
-    temp_path = Path(temp_dir)
-    temp_path.mkdir(parents=True, exist_ok=True)
+# File links only swap a literal prefix, which str.replace() handles
+_FILEBASE_PREFIX = '$IMS-CC-FILEBASE$/'
+_LOCAL_FILEBASE_PREFIX = '../web_resources/'
+
+# One alternation for every other Canvas reference so each page is scanned
+# once; the group that matched (m.lastindex) says which kind of link it was.
+_CANVAS_LINK_RE = re.compile(
+    r'\$WIKI_REFERENCE\$/pages/([^"\'>\s]+)'
+    r'|\$CANVAS_OBJECT_REFERENCE\$/pages/([^"\'>\s]+)'
+    r'|\$CANVAS_OBJECT_REFERENCE\$/assignments/([^"\'?>\s]+)'
+    r'|\$CANVAS_OBJECT_REFERENCE\$/modules/([^"\'?>\s]+)'
+)
+_WIKI_LINK = 1
+_PAGE_LINK = 2
+_ASSIGNMENT_LINK = 3
+
+# Page title (group 1) or Canvas identifier meta tag (group 2). Matched
+# against the raw page bytes, so the first pass never decodes a whole page.
+_HEAD_RE = re.compile(
+    rb'<title>([^<]+)</title>'
+    rb'|<meta\s+name="identifier"\s+content="([^"]+)"',
+    re.IGNORECASE
+)
+# HTML tags are ASCII; re.ASCII skips Unicode case folding
+_BODY_RE = re.compile(r'(<body[^>]*>)', re.IGNORECASE | re.ASCII)
+
+_SLUG_CLEAN_RE = re.compile(r'[^\w\s-]')
+_SLUG_DASH_RE = re.compile(r'[-\s]+')
+
+# Resource extraction is read/write/zlib bound, all of which release the GIL
+_EXTRACT_WORKERS = (os.cpu_count() or 1) * 2
+
+def decode_text(data):
+    """Decode UTF-8 bytes to text with universal newlines, like read_text()."""
+    text = data.decode('utf-8')
+    if '\r' in text:
+        text = text.replace('\r\n', '\n').replace('\r', '\n')
+    return text
+
+
+def write_text_file(path, text):
+    """
+    Write text to path as UTF-8 with a single unbuffered write.
     
-    with zipfile.ZipFile(imscc_path, 'r') as zip_ref:
-        zip_ref.extractall(temp_path)
-    
-    print(f"✓ Extracted {imscc_path}")
-    return temp_path
-
-
-def parse_manifest(manifest_path):
-    """Parse imsmanifest.xml to extract course metadata and structure."""
-    tree = ET.parse(manifest_path)
-    root = tree.getroot()
-    
-    # Define XML namespaces
-    ns = {
-        'imscc': 'http://www.imsglobal.org/xsd/imsccv1p1/imscp_v1p1',
-        'imsmd': 'http://ltsc.ieee.org/xsd/imsccv1p1/LOM/manifest',
-        'lomimscc': 'http://ltsc.ieee.org/xsd/imsccv1p1/LOM/resource'
-    }
-    
-    # Extract basic metadata
-    metadata = {
-        'title': None,
-        'course_code': None,
-        'identifier': None
-    }
-    
-    # Get identifier
-    metadata['identifier'] = root.get('identifier')
-    
-    # Try to get title from metadata
-    title_elem = root.find('.//imsmd:general/imsmd:title/imsmd:string', ns)
-    if title_elem is not None and title_elem.text:
-        metadata['title'] = title_elem.text
-    
-    # Extract resources (pages, files, quizzes, assignments)
-    resources = []
-    for resource in root.findall('.//imscc:resource', ns):
-        res_type = resource.get('type', '')
-        identifier = resource.get('identifier', '')
-        href = resource.get('href', '')
-        
-        res_info = {
-            'type': res_type,
-            'identifier': identifier,
-            'href': href,
-            'files': []
+    Skips the TextIOWrapper/BufferedWriter layers of Path.write_text(),
+    which only add encoder and flush overhead for a one-shot write.
+    """
+    data = memoryview(text.encode('utf-8'))
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o666)
+    try:
+        # os.write() may write less than asked for
+        while data:
+            data = data[os.write(fd, data):]
+    finally:
+        os.close(fd)
+
+
+def extract_members(zip_ref, names, dest):
+    """Extract members under dest."""
+    for name in names:
+        zip_ref.extract(name, dest)
+
+
+def _extract_members_from(archive_path, names, dest):
+    """Worker for extract_members() with a ZipFile handle of its own."""
+    with zipfile.ZipFile(archive_path, 'r') as zip_ref:
+        extract_members(zip_ref, names, dest)
+
+
+def read_member_text(zip_ref, name):
+    """Read an archive member as UTF-8 text with universal newlines."""
+    return decode_text(zip_ref.read(name))
+
+
+# Manifest namespaces and the tags parse_manifest() looks for
+_IMSCC_NS = 'http://www.imsglobal.org/xsd/imsccv1p1/imscp_v1p1'
+_IMSMD_NS = 'http://ltsc.ieee.org/xsd/imsccv1p1/LOM/manifest'
+_RESOURCE_TAG = '{%s}resource' % _IMSCC_NS
+_FILE_TAG = '{%s}file' % _IMSCC_NS
+_GENERAL_TAG = '{%s}general' % _IMSMD_NS
+_TITLE_TAG = '{%s}title' % _IMSMD_NS
+_STRING_TAG = '{%s}string' % _IMSMD_NS
+
+_MANIFEST_CHUNK_SIZE = 64 * 1024
+
+
+class _ManifestReader:
+    """
+    XMLParser target that collects manifest metadata and resources.
+    
+    No element tree is built: the parser calls start()/end()/data() as it
+    goes, each <resource> becomes a dict when it closes, and only the
+    stack of open tag names is kept. Memory therefore stays flat however
+    many resources the manifest lists.
+    """
+    
+    def __init__(self):
+        self.metadata = {
+            'title': None,
+            'course_code': None,
+            'identifier': None
         }
+        self.resources = []
+        self._tags = []
+        self._resource = None
+        self._title_found = False
+        self._title_parts = None  # text of the title <string> being read
+    
+    def start(self, tag, attrib):
+        tags = self._tags
+        if not tags:
+            # Get identifier from the root element
+            self.metadata['identifier'] = attrib.get('identifier')
+        elif self._title_parts is not None:
+            # Element text ends at the first child, as in ElementTree
+            self._finish_title()
+        tags.append(tag)
         
-        # Get associated files
-        for file_elem in resource.findall('imscc:file', ns):
-            file_href = file_elem.get('href', '')
-            if file_href:
-                res_info['files'].append(file_href)
-        
-        resources.append(res_info)
+        if tag == _RESOURCE_TAG:
+            # Extract resources (pages, files, quizzes, assignments)
+            self._resource = {
+                'type': attrib.get('type', ''),
+                'identifier': attrib.get('identifier', ''),
+                'href': attrib.get('href', ''),
+                'files': []
+            }
+        elif tag == _FILE_TAG:
+            # Get associated files (direct children of the resource)
+            file_href = attrib.get('href', '')
+            if file_href and tags[-2] == _RESOURCE_TAG and self._resource is not None:
+                self._resource['files'].append(file_href)
+        elif (tag == _STRING_TAG and not self._title_found
+              and tags[-3:-1] == [_GENERAL_TAG, _TITLE_TAG]):
+            # Title from the first general/title/string in the metadata
+            self._title_parts = []
+    
+    def data(self, text):
+        if self._title_parts is not None:
+            self._title_parts.append(text)
+    
+    def end(self, tag):
+        self._tags.pop()
+        if self._title_parts is not None:
+            self._finish_title()
+        if tag == _RESOURCE_TAG and self._resource is not None:
+            self.resources.append(self._resource)
+            self._resource = None
+    
+    def close(self):
+        return self.metadata, self.resources
+    
+    def _finish_title(self):
+        self._title_found = True
+        title = ''.join(self._title_parts)
+        self._title_parts = None
+        if title:
+            self.metadata['title'] = title
+
+
+def parse_manifest(manifest_file):
+    """
+    Parse imsmanifest.xml to extract course metadata and structure.
     
-    return metadata, resources
+    Args:
+        manifest_file: Path or binary file object of the manifest
+    """
+    if not hasattr(manifest_file, 'read'):
+        with open(manifest_file, 'rb') as f:
+            return parse_manifest(f)
+    
+    # Stream the manifest through the parser instead of building its tree
+    parser = ET.XMLParser(target=_ManifestReader())
+    while True:
+        chunk = manifest_file.read(_MANIFEST_CHUNK_SIZE)
+        if not chunk:
+            break
+        parser.feed(chunk)
+    return parser.close()
 
 
-def parse_course_settings(extracted_path):
+def parse_course_settings(zip_ref):
     """Parse course_settings.xml if it exists."""
-    settings_path = extracted_path / 'course_settings' / 'course_settings.xml'
+    settings_path = 'course_settings/course_settings.xml'
     
-    if not settings_path.exists():
+    # getinfo() is a dict lookup; namelist() would build the full name list
+    try:
+        info = zip_ref.getinfo(settings_path)
+    except KeyError:
         return {}
     
-    tree = ET.parse(settings_path)
-    root = tree.getroot()
+    root = ET.fromstring(zip_ref.read(info))
     
     settings = {}
     
@@ -119,15 +239,16 @@ def parse_course_settings(extracted_path):
     return settings
 
 
-def parse_module_meta(extracted_path):
+def parse_module_meta(zip_ref):
     """Parse module_meta.xml to extract module structure."""
-    module_path = extracted_path / 'course_settings' / 'module_meta.xml'
+    module_path = 'course_settings/module_meta.xml'
     
-    if not module_path.exists():
+    try:
+        info = zip_ref.getinfo(module_path)
+    except KeyError:
         return []
     
-    tree = ET.parse(module_path)
-    root = tree.getroot()
+    root = ET.fromstring(zip_ref.read(info))
     
     modules = []
     
@@ -146,10 +267,15 @@ def parse_module_meta(extracted_path):
         items_elem = module_elem.find('items')
         if items_elem is not None:
             for item_elem in items_elem.findall('item'):
+                # One walk over the children; the first of each tag wins,
+                # matching find()
+                fields = {}
+                for child in item_elem:
+                    fields.setdefault(child.tag, child.text)
                 item = {
-                    'type': item_elem.find('content_type').text if item_elem.find('content_type') is not None else 'WikiPage',
-                    'identifier': item_elem.find('identifierref').text if item_elem.find('identifierref') is not None else '',
-                    'title': item_elem.find('title').text if item_elem.find('title') is not None else ''
+                    'type': fields.get('content_type', 'WikiPage'),
+                    'identifier': fields.get('identifierref', ''),
+                    'title': fields.get('title', '')
                 }
                 module['items'].append(item)
         
@@ -173,97 +299,96 @@ def convert_canvas_links_to_local(html_content, page_identifier_to_filename):
         html_content: The HTML content to process
         page_identifier_to_filename: Dict mapping page identifier/slug to filename
     """
+    # Every Canvas reference starts with '$'; most pages have none at all
+    if '$' not in html_content:
+        return html_content
+    
     # Convert file links: $IMS-CC-FILEBASE$/path/file.ext → ../web_resources/path/file.ext
     # This handles all paths including web_resources/, Uploaded Media/, etc.
-    html_content = re.sub(
-        r'\$IMS-CC-FILEBASE\$/([^"\'>\s]+)',
-        r'../web_resources/\1',
-        html_content
-    )
+    html_content = html_content.replace(_FILEBASE_PREFIX, _LOCAL_FILEBASE_PREFIX)
+    if '$' not in html_content:
+        return html_content
     
-    # Convert wiki page links: $WIKI_REFERENCE$/pages/identifier → filename.html
-    def replace_wiki_link(match):
-        page_id = match.group(1)
+    def replace_link(match):
+        kind = match.lastindex
+        target = match.group(kind)
         
-        # Look up filename from identifier
-        if page_id in page_identifier_to_filename:
-            filename = page_identifier_to_filename[page_id]
-        else:
+        # Convert wiki page links: $WIKI_REFERENCE$/pages/identifier → filename.html
+        if kind == _WIKI_LINK:
+            # Look up filename from identifier
+            if target in page_identifier_to_filename:
+                return f'{page_identifier_to_filename[target]}.html'
             # Fallback: can't convert, leave as comment
-            return f'[PAGE:{page_id}]'
+            return f'[PAGE:{target}]'
         
-        return f'{filename}.html'
-    
-    html_content = re.sub(
-        r'\$WIKI_REFERENCE\$/pages/([^"\'>\s]+)',
-        replace_wiki_link,
-        html_content
-    )
-    
-    # Convert page links: $CANVAS_OBJECT_REFERENCE$/pages/slug → slug.html
-    def replace_page_link(match):
-        page_slug = match.group(1)
+        # Convert page links: $CANVAS_OBJECT_REFERENCE$/pages/slug → slug.html
+        if kind == _PAGE_LINK:
+            # Look up filename from slug, falling back to the slug itself
+            return f'{page_identifier_to_filename.get(target, target)}.html'
         
-        # Look up filename from slug
-        if page_slug in page_identifier_to_filename:
-            filename = page_identifier_to_filename[page_slug]
-        else:
-            # Fallback: use slug as filename
-            filename = page_slug
+        # Convert assignment links: $CANVAS_OBJECT_REFERENCE$/assignments/id → [ASSIGNMENT:id]
+        # Leave as placeholder since we can't determine local assignment filename
+        if kind == _ASSIGNMENT_LINK:
+            return f'[ASSIGNMENT:{target}]'
         
-        return f'{filename}.html'
-    
-    html_content = re.sub(
-        r'\$CANVAS_OBJECT_REFERENCE\$/pages/([^"\'>\s]+)',
-        replace_page_link,
-        html_content
-    )
+        # Remove module links (can't be represented locally)
+        # Replace with a comment so user knows what was there
+        return f'[MODULE:{target}]'
     
-    # Convert assignment links: $CANVAS_OBJECT_REFERENCE$/assignments/id → [ASSIGNMENT:id]
-    # Leave as placeholder since we can't determine local assignment filename
-    html_content = re.sub(
-        r'\$CANVAS_OBJECT_REFERENCE\$/assignments/([^"\'?>\s]+)',
-        r'[ASSIGNMENT:\1]',
-        html_content
-    )
-    
-    # Remove module links (can't be represented locally)
-    # Replace with a comment so user knows what was there
-    html_content = re.sub(
-        r'\$CANVAS_OBJECT_REFERENCE\$/modules/([^"\'?>\s]+)',
-        r'[MODULE:\1]',
-        html_content
-    )
+    html_content = _CANVAS_LINK_RE.sub(replace_link, html_content)
     
     return html_content
 
 
+def scan_page_head(data):
+    """
+    Find a page's title and Canvas identifier in one pass over the HTML.
+    
+    Takes the raw page bytes and returns (title, identifier) as str;
+    either is None when the page lacks it. Scanning stops as soon as both
+    have been seen, which for Canvas exports is inside <head>.
+    """
+    title = None
+    canvas_id = None
+    for match in _HEAD_RE.finditer(data):
+        if match.lastindex == 1:
+            if title is None:
+                title = decode_text(match.group(1))
+        elif canvas_id is None:
+            canvas_id = decode_text(match.group(2))
+        if title is not None and canvas_id is not None:
+            break
+    return title, canvas_id
+
+
 def title_to_slug(title):
     """Convert page title to Canvas-compatible slug."""
     slug = title.lower()
-    slug = re.sub(r'[^\w\s-]', '', slug)
-    slug = re.sub(r'[-\s]+', '-', slug)
+    slug = _SLUG_CLEAN_RE.sub('', slug)
+    slug = _SLUG_DASH_RE.sub('-', slug)
     slug = slug.strip('-')
     return slug
 
 
 def title_to_filename(title):
-    """Convert title to a safe filename."""
-    filename = title.lower()
-    filename = re.sub(r'[^\w\s-]', '', filename)
-    filename = re.sub(r'[-\s]+', '-', filename)
-    filename = filename.strip('-')
-    return filename
+    """Convert title to a safe filename; this is the same string as its slug."""
+    return title_to_slug(title)
 
 
-def create_template_structure(extracted_path, output_dir):
-    """Create the template folder structure from extracted IMSCC."""
+def create_template_from_zip(zip_ref, output_dir, verbose=False):
+    """
+    Create the template folder structure from an open IMSCC archive.
+    
+    Wiki pages and web resources are reported with one summary line each;
+    pass verbose=True to list every file as it is written.
+    """
     output_path = Path(output_dir)
     output_path.mkdir(parents=True, exist_ok=True)
     
     # Parse course settings
-    course_settings = parse_course_settings(extracted_path)
-    manifest_metadata, resources = parse_manifest(extracted_path / 'imsmanifest.xml')
+    course_settings = parse_course_settings(zip_ref)
+    with zip_ref.open('imsmanifest.xml') as f:
+        manifest_metadata, resources = parse_manifest(f)
     
     # Merge metadata
     course_data = {}
@@ -284,12 +409,11 @@ def create_template_structure(extracted_path, output_dir):
     
     # Write course.json
     course_json_path = output_path / 'course.json'
-    with open(course_json_path, 'w', encoding='utf-8') as f:
-        json.dump(course_data, f, indent=2)
+    write_text_file(course_json_path, json.dumps(course_data, indent=2))
     print(f"✓ Created course.json")
     
     # Parse modules
-    modules_data = parse_module_meta(extracted_path)
+    modules_data = parse_module_meta(zip_ref)
     
     # Create directories
     wiki_dir = output_path / 'wiki_content'
@@ -302,49 +426,42 @@ def create_template_structure(extracted_path, output_dir):
     page_identifier_to_filename = {}
     page_identifier_to_info = {}
     
-    # Process wiki pages
-    wiki_source_dir = extracted_path / 'wiki_content'
-    if wiki_source_dir.exists():
-        for html_file in wiki_source_dir.glob('*.html'):
-            # Read the page
-            content = html_file.read_text(encoding='utf-8')
-            
-            # Try to extract title from HTML
-            title_match = re.search(r'<title>([^<]+)</title>', content, re.IGNORECASE)
-            if title_match:
-                page_title = title_match.group(1)
-            else:
-                page_title = html_file.stem.replace('-', ' ').title()
-            
-            # Extract Canvas identifier from meta tag
-            canvas_id = None
-            id_match = re.search(r'<meta\s+name="identifier"\s+content="([^"]+)"', content, re.IGNORECASE)
-            if id_match:
-                canvas_id = id_match.group(1)
-            
-            # Generate slug and filename
-            page_slug = title_to_slug(page_title)
-            page_filename = title_to_filename(page_title)
-            
-            # Map both slug and Canvas identifier to filename
-            page_identifier_to_filename[page_slug] = page_filename
-            if canvas_id:
-                page_identifier_to_filename[canvas_id] = page_filename
-            # Also map the original HTML filename (without .html)
-            page_identifier_to_filename[html_file.stem] = page_filename
-            
-            # Store for later
-            page_identifier_to_info[html_file.stem] = {
-                'title': page_title,
-                'filename': page_filename,
-                'slug': page_slug,
-                'canvas_id': canvas_id,
-                'content': content
-            }
+    # Process wiki pages (top-level wiki_content/*.html members; a name
+    # stored twice is read once, and open() returns its last copy)
+    for name in dict.fromkeys(zip_ref.namelist()):
+        dirname, _, basename = name.partition('/')
+        if dirname != 'wiki_content' or '/' in basename or not basename.endswith('.html'):
+            continue
+        html_stem = basename[:-len('.html')]
+        # Extract title and Canvas identifier (meta tag) from HTML
+        page_title, canvas_id = scan_page_head(zip_ref.read(name))
+        if page_title is None:
+            page_title = html_stem.replace('-', ' ').title()
+        
+        # Generate slug and filename; a page's local filename is its slug
+        page_slug = title_to_slug(page_title)
+        page_filename = page_slug
+        
+        # Map both slug and Canvas identifier to filename
+        page_identifier_to_filename[page_slug] = page_filename
+        if canvas_id:
+            page_identifier_to_filename[canvas_id] = page_filename
+        # Also map the original HTML filename (without .html)
+        page_identifier_to_filename[html_stem] = page_filename
+        
+        # Store for later. The HTML itself is not kept: the second pass
+        # re-reads each page, so only one page is held in memory at a time.
+        page_identifier_to_info[html_stem] = {
+            'title': page_title,
+            'filename': page_filename,
+            'slug': page_slug,
+            'canvas_id': canvas_id,
+            'member': name
+        }
     
     # Convert links in all pages and write them
     for page_id, page_info in page_identifier_to_info.items():
-        content = page_info['content']
+        content = read_member_text(zip_ref, page_info['member'])
         
         # Convert Canvas links to local links
         content = convert_canvas_links_to_local(content, page_identifier_to_filename)
@@ -352,7 +469,7 @@ def create_template_structure(extracted_path, output_dir):
         # Add CANVAS_META comment at the top if not present
         if '<!-- CANVAS_META' not in content:
             # Try to insert after <body> tag
-            body_match = re.search(r'(<body[^>]*>)', content, re.IGNORECASE)
+            body_match = _BODY_RE.search(content)
             if body_match:
                 insert_pos = body_match.end()
                 meta_comment = f'\n<!-- CANVAS_META\ntitle: {page_info["title"]}\n-->\n\n'
@@ -360,24 +477,58 @@ def create_template_structure(extracted_path, output_dir):
         
         # Write to wiki_content
         output_file = wiki_dir / f"{page_info['filename']}.html"
-        output_file.write_text(content, encoding='utf-8')
-        print(f"✓ Created wiki_content/{page_info['filename']}.html")
-    
-    # Copy web_resources
-    web_resources_source = extracted_path / 'web_resources'
-    if web_resources_source.exists():
-        import shutil
-        for item in web_resources_source.rglob('*'):
-            if item.is_file():
-                rel_path = item.relative_to(web_resources_source)
-                dest_path = resources_dir / rel_path
-                dest_path.parent.mkdir(parents=True, exist_ok=True)
-                shutil.copy2(item, dest_path)
-                print(f"✓ Copied web_resources/{rel_path}")
+        write_text_file(output_file, content)
+        if verbose:
+            print(f"✓ Created wiki_content/{page_info['filename']}.html")
+    if page_identifier_to_info:
+        print(f"✓ Created {len(page_identifier_to_info)} pages in wiki_content/")
+    
+    # Copy web_resources straight out of the archive. extract() streams
+    # each member to disk and sanitizes its path; since member names start
+    # with web_resources/, they land under resources_dir.
+    resource_names = [
+        name for name in dict.fromkeys(zip_ref.namelist())
+        if name.startswith('web_resources/') and not name.endswith('/')
+    ]
+    if resource_names:
+        workers = min(_EXTRACT_WORKERS, len(resource_names))
+        if zip_ref.filename is None or workers == 1:
+            extract_members(zip_ref, resource_names, output_path)
+        else:
+            # Members are independent, so extract them on a thread pool.
+            # A ZipFile's file position is shared, so each worker opens
+            # the archive itself. The parent directories are created up
+            # front because extract()'s own exists-then-makedirs check
+            # races between threads; empty, '.' and '..' components are
+            # dropped the same way extract() drops them.
+            for parent in {os.path.dirname(name) for name in resource_names}:
+                parts = [part for part in parent.split('/') if part not in ('', '.', '..')]
+                output_path.joinpath(*parts).mkdir(parents=True, exist_ok=True)
+            
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                futures = [
+                    executor.submit(_extract_members_from, zip_ref.filename,
+                                    resource_names[i::workers], output_path)
+                    for i in range(workers)
+                ]
+                for future in futures:
+                    future.result()
+        
+        # Report from this thread, in archive order
+        if verbose:
+            for name in resource_names:
+                print(f"✓ Copied web_resources/{name[len('web_resources/'):]}")
+        print(f"✓ Copied {len(resource_names)} files to web_resources/")
     
     # Process modules - map identifiers to filenames
     modules_output = []
     if modules_data:
+        # Title fallback index; the first page with a given title wins,
+        # as the linear scan it replaces did
+        page_info_by_title = {}
+        for pinfo in page_identifier_to_info.values():
+            page_info_by_title.setdefault(pinfo['title'], pinfo)
+        
         for module in modules_data:
             module_out = {
                 'title': module['title'],
@@ -392,10 +543,9 @@ def create_template_structure(extracted_path, output_dir):
                         module_out['pages'].append(page_identifier_to_info[page_id]['filename'])
                     else:
                         # Try to match by title
-                        for pid, pinfo in page_identifier_to_info.items():
-                            if pinfo['title'] == item['title']:
-                                module_out['pages'].append(pinfo['filename'])
-                                break
+                        pinfo = page_info_by_title.get(item['title'])
+                        if pinfo is not None:
+                            module_out['pages'].append(pinfo['filename'])
             
             if module_out['pages']:  # Only add modules with pages
                 modules_output.append(module_out)
@@ -404,8 +554,7 @@ def create_template_structure(extracted_path, output_dir):
     if modules_output:
         modules_json = {'modules': modules_output}
         modules_json_path = output_path / 'modules.json'
-        with open(modules_json_path, 'w', encoding='utf-8') as f:
-            json.dump(modules_json, f, indent=2)
+        write_text_file(modules_json_path, json.dumps(modules_json, indent=2))
         print(f"✓ Created modules.json ({len(modules_output)} modules)")
     
     # Create README
@@ -473,12 +622,31 @@ home: true
 """
     
     readme_path = output_path / 'README.md'
-    readme_path.write_text(readme_content, encoding='utf-8')
+    write_text_file(readme_path, readme_content)
     print(f"✓ Created README.md")
     
     return output_path
 
 
+def create_template_structure(extracted_path, output_dir, verbose=False):
+    """
+    Create the template folder structure from an extracted IMSCC.
+    
+    Kept for callers that extract the archive themselves. The directory is
+    packed into a temporary uncompressed archive and converted with
+    create_template_from_zip(), which main() uses on the .imscc directly.
+    """
+    extracted_path = Path(extracted_path)
+    with tempfile.TemporaryDirectory() as temp_dir:
+        archive_path = Path(temp_dir) / 'course.imscc'
+        with zipfile.ZipFile(archive_path, 'w', zipfile.ZIP_STORED) as zip_out:
+            for path in sorted(extracted_path.rglob('*')):
+                if path.is_file():
+                    zip_out.write(path, path.relative_to(extracted_path).as_posix())
+        with zipfile.ZipFile(archive_path, 'r') as zip_ref:
+            return create_template_from_zip(zip_ref, output_dir, verbose=verbose)
+
+
 def main():
     parser = argparse.ArgumentParser(
         description='Convert IMSCC file to locally editable template',
@@ -495,6 +663,7 @@ This creates a template folder you can edit locally, then rebuild with:
     
     parser.add_argument('imscc_file', help='Path to the IMSCC file')
     parser.add_argument('-o', '--output', help='Output directory name (default: based on IMSCC filename)')
+    parser.add_argument('-v', '--verbose', action='store_true', help='List every page and file as it is written')
     
     args = parser.parse_args()
     
@@ -517,28 +686,20 @@ This creates a template folder you can edit locally, then rebuild with:
     print(f"Input: {imscc_path}")
     print(f"Output: {output_dir}/\n")
     
-    # Create temporary extraction directory
-    temp_dir = Path('.temp_imscc_extract')
-    
-    try:
-        # Extract IMSCC
-        extracted_path = extract_imscc(imscc_path, temp_dir)
+    # Read the IMSCC in place; members are parsed or streamed to the
+    # template directly, so there is no scratch directory to clean up
+    with zipfile.ZipFile(imscc_path, 'r') as zip_ref:
+        print(f"✓ Opened {imscc_path}")
         
         # Create template structure
-        template_path = create_template_structure(extracted_path, output_dir)
-        
-        print(f"\n✅ Template created successfully!")
-        print(f"\nNext steps:")
-        print(f"  1. cd {output_dir}")
-        print(f"  2. Edit files in wiki_content/ and web_resources/")
-        print(f"  3. python ../build_from_template.py .")
-        print(f"  4. Import the generated .imscc to Canvas\n")
-        
-    finally:
-        # Clean up temp directory
-        if temp_dir.exists():
-            import shutil
-            shutil.rmtree(temp_dir)
+        template_path = create_template_from_zip(zip_ref, output_dir, verbose=args.verbose)
+    
+    print(f"\n✅ Template created successfully!")
+    print(f"\nNext steps:")
+    print(f"  1. cd {output_dir}")
+    print(f"  2. Edit files in wiki_content/ and web_resources/")
+    print(f"  3. python ../build_from_template.py .")
+    print(f"  4. Import the generated .imscc to Canvas\n")
 
 
 if __name__ == '__main__':
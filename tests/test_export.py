@@ -0,0 +1,257 @@
+"""Tests for course export and the template round trip."""
+
+import json
+import re
+import threading
+import zipfile
+from datetime import datetime
+from pathlib import Path
+from xml.etree.ElementTree import canonicalize
+
+import pytest
+
+import build_from_template
+import imscc.course
+import template_from_imscc
+from imscc import Assignment, Course, Rubric, WikiPage
+from imscc.quiz import (
+    Quiz, EssayQuestion, FillInBlankQuestion, FillInMultipleBlanksQuestion,
+    FileUploadQuestion, FormulaQuestion, MatchingQuestion,
+    MultipleAnswersQuestion, MultipleChoiceQuestion, MultipleDropdownsQuestion,
+    NumericalAnswerQuestion, TextOnlyQuestion, TrueFalseQuestion,
+)
+
+# Canonical export of build_course() from the ElementTree-based writer
+# that predates the streaming one, with identifiers and dates normalized
+GOLDEN = Path(__file__).parent / 'data' / 'export_golden.txt'
+
+_ID_RE = re.compile(
+    r'[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}|[0-9a-f]{32}'
+)
+_DATE_RE = re.compile(r'\d{4}-\d\d-\d\d(?=</lomimscc:dateTime>)')
+
+
+def build_course(resource_dir):
+    """Build a course that exercises every document type the exporter writes."""
+    for name in ['a.txt', 'sub/b.txt', 'sub/deep/c.txt']:
+        path = resource_dir / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(b'content of ' + name.encode() * 50)
+
+    course = Course(title='Tom and Jerry', course_code='TJ101')
+    welcome = course.add_page('Welcome & <Intro>', '<h1>Hi & bye</h1>',
+                              is_front_page=True)
+    lesson = course.add_page('Lesson "One"', '<p>x</p>')
+    course.add_page('Reading', '<p>' + 'Long & streamed. ' * 100 + '</p>')
+    course.add_directory(str(resource_dir))
+    course.add_file(str(resource_dir / 'a.txt'), 'web_resources/x/y/a.txt')
+
+    homework = course.create_assignment_group('Homework & Labs', group_weight=40.0)
+    rubric = Rubric(title='Rubric <1>')
+    rubric.add_criterion('Quality & style', 10, 'long "desc"', ratings=[
+        {'description': 'Great', 'points': 10, 'long_description': 'a & b'},
+        {'description': 'Bad', 'points': 0},
+    ])
+    assignment = Assignment(
+        title='HW <1> & "two"', description='<p>Do it</p>', points_possible=10,
+        submission_types='online_upload', allowed_extensions='pdf',
+        due_at=datetime(2024, 1, 2, 3, 4, 5), rubric=rubric,
+    )
+    course.add_assignment(assignment, homework)
+    course.add_assignment(Assignment(title='Plain', description=''))
+
+    quiz = Quiz(title='Quiz & <1>', description='<p>desc & more</p>',
+                time_limit=10, due_at='2024-01-01T00:00:00')
+    quiz.add_question(MultipleChoiceQuestion('<p>2+2?</p>', [
+        {'text': '3', 'correct': False},
+        {'text': '4 & <four>', 'correct': True},
+    ], 2.0))
+    quiz.add_question(TrueFalseQuestion('T?', True))
+    quiz.add_question(TrueFalseQuestion('F?', False, 1.5))
+    quiz.add_question(FillInBlankQuestion('Capital?', ['Paris', 'paris']))
+    quiz.add_question(FillInMultipleBlanksQuestion(
+        '[a] [b]', {'a': ['x'], 'b': ['y', 'Y']}, 3))
+    quiz.add_question(MultipleAnswersQuestion('Pick', [
+        {'text': 'a', 'correct': True}, {'text': 'b'}, {'text': 'c', 'correct': True},
+    ]))
+    quiz.add_question(MultipleDropdownsQuestion('[d1] [d2]', {
+        'd1': [{'text': 'a'}, {'text': 'b', 'correct': True}],
+        'd2': [{'text': 'c', 'correct': True}],
+    }))
+    quiz.add_question(MatchingQuestion('Match', [
+        {'prompt': 'Stack', 'answer': 'LIFO'},
+        {'prompt': 'Queue', 'answer': 'FIFO'},
+    ], distractors=['X']))
+    quiz.add_question(NumericalAnswerQuestion('N1', exact_answer=3.5))
+    quiz.add_question(NumericalAnswerQuestion('N2', exact_answer=3.5, margin=0.5))
+    quiz.add_question(NumericalAnswerQuestion('N3', answer_range=(1, 2)))
+    quiz.add_question(FormulaQuestion('F', '[l]*[w]', {'l': (1.0, 2.0), 'w': (3, 4)}))
+    quiz.add_question(EssayQuestion('Essay'))
+    quiz.add_question(FileUploadQuestion('Upload'))
+    quiz.add_question(TextOnlyQuestion('Info'))
+    course.add_quiz(quiz)
+    course.add_quiz(Quiz(title='Empty', points_possible=5), homework)
+
+    module = course.create_module('Week & 1')
+    module.add_page(welcome).add_page(lesson, indent=1)
+    module.add_assignment(assignment).add_quiz(quiz)
+    course.create_module('Empty module', require_sequential_progress=True)
+    return course
+
+
+def canonical_export(imscc_path):
+    """
+    Dump an exported archive in a form that ignores incidental differences.
+
+    XML members are C14N-canonicalized with whitespace-only text stripped,
+    generated identifiers are numbered in order of first appearance (manifest
+    first), and the manifest's creation date is masked. The old writer kept
+    non_cc_assessments/ alive with an empty .keep file where the streaming
+    one writes a directory entry, so both are listed as the bare directory.
+    """
+    mapping = {}
+
+    def normalize(text):
+        text = _ID_RE.sub(
+            lambda m: mapping.setdefault(m.group(0), f'ID{len(mapping):04d}'), text)
+        return _DATE_RE.sub('DATE', text)
+
+    with zipfile.ZipFile(imscc_path) as zf:
+        normalize(zf.read('imsmanifest.xml').decode('utf-8'))
+        members = []
+        for name in zf.namelist():
+            text = zf.read(name).decode('utf-8')
+            if name.endswith('/.keep'):
+                name = name[:-len('.keep')]
+            if name.endswith(('.xml', '.qti')):
+                if text.startswith('<?xml'):
+                    text = text.split('?>', 1)[1]
+                text = canonicalize(text, strip_text=True).replace('><', '>\n<')
+            members.append((normalize(name), text))
+
+    members.sort()
+    return ''.join(f'==== {name}\n{normalize(text)}\n' for name, text in members)
+
+
+def export(course, path):
+    course.export(str(path))
+    return path
+
+
+def test_export_matches_golden(tmp_path):
+    course = build_course(tmp_path / 'res')
+    imscc_path = export(course, tmp_path / 'course.imscc')
+
+    assert canonical_export(imscc_path) == GOLDEN.read_text(encoding='utf-8')
+
+
+def test_export_on_disk_matches_golden(tmp_path, monkeypatch):
+    # Force the branch that writes straight to the output file
+    monkeypatch.setattr(imscc.course, '_IN_MEMORY_EXPORT_LIMIT', 0)
+    course = build_course(tmp_path / 'res')
+    imscc_path = export(course, tmp_path / 'course.imscc')
+
+    assert canonical_export(imscc_path) == GOLDEN.read_text(encoding='utf-8')
+
+
+def test_question_edited_after_render_is_exported(tmp_path):
+    question = MultipleChoiceQuestion('<p>Old question</p>', [
+        {'text': 'old', 'correct': True},
+        {'text': 'other'},
+    ])
+    quiz = Quiz(title='Quiz').add_question(question)
+    course = Course(title='Edits')
+    course.add_quiz(quiz)
+
+    # Render once so any cached output would be stale by export time
+    assert 'Old question' in quiz.to_qti_xml()
+    question.question_text = '<p>New question</p>'
+    question.answers.append({'text': 'new', 'correct': False})
+
+    imscc_path = export(course, tmp_path / 'edits.imscc')
+    with zipfile.ZipFile(imscc_path) as zf:
+        qti = zf.read(f'non_cc_assessments/{quiz.identifier}.xml.qti').decode('utf-8')
+
+    assert 'Old question' not in qti
+    assert 'New question' in qti
+    assert '<mattext texttype="text/html">new</mattext>' in qti
+
+
+def _fail_render(*args):
+    raise RuntimeError('render failed')
+
+
+def _render_threads():
+    return [t for t in threading.enumerate() if t.name == 'imscc-render']
+
+
+@pytest.mark.parametrize('in_memory_limit', [imscc.course._IN_MEMORY_EXPORT_LIMIT, 0])
+@pytest.mark.parametrize('method', [
+    # Rendered on the producer thread
+    (WikiPage, 'to_html'),
+    # Called by the writer as a streaming payload
+    (Quiz, 'write_qti_xml'),
+])
+def test_export_render_error_propagates(tmp_path, monkeypatch, method, in_memory_limit):
+    course = build_course(tmp_path / 'res')
+    monkeypatch.setattr(*method, _fail_render)
+    monkeypatch.setattr(imscc.course, '_IN_MEMORY_EXPORT_LIMIT', in_memory_limit)
+    imscc_path = tmp_path / 'course.imscc'
+
+    with pytest.raises(RuntimeError, match='render failed'):
+        course.export(str(imscc_path))
+
+    assert not imscc_path.exists()
+    assert not _render_threads()
+
+
+def test_template_round_trip(tmp_path):
+    course = build_course(tmp_path / 'res')
+    imscc_path = export(course, tmp_path / 'course.imscc')
+
+    template_dir = tmp_path / 'template'
+    with zipfile.ZipFile(imscc_path) as zf:
+        template_from_imscc.create_template_from_zip(zf, template_dir)
+
+    course_json = json.loads((template_dir / 'course.json').read_text(encoding='utf-8'))
+    assert course_json['title'] == course.title
+    assert (template_dir / 'web_resources' / 'sub' / 'deep' / 'c.txt').read_bytes() == \
+        (tmp_path / 'res' / 'sub' / 'deep' / 'c.txt').read_bytes()
+
+    rebuilt_path = tmp_path / 'rebuilt.imscc'
+    assert build_from_template.build_imscc(str(template_dir), str(rebuilt_path))
+
+    with zipfile.ZipFile(imscc_path) as original, \
+            zipfile.ZipFile(rebuilt_path) as rebuilt:
+        rebuilt_names = set(rebuilt.namelist())
+        for name in original.namelist():
+            if name.startswith('web_resources/'):
+                assert rebuilt.read(name) == original.read(name)
+        pages = {name: rebuilt.read(name).decode('utf-8')
+                 for name in rebuilt_names if name.startswith('wiki_content/')}
+
+    assert sorted(pages) == [
+        'wiki_content/lesson-one.html',
+        'wiki_content/reading.html',
+        'wiki_content/welcome-intro.html',
+    ]
+    # Page bodies are HTML and pass through both conversions verbatim
+    assert '<body>\n<h1>Hi & bye</h1>\n</body>' in pages['wiki_content/welcome-intro.html']
+    assert '<body>\n<p>x</p>\n</body>' in pages['wiki_content/lesson-one.html']
+
+
+def test_template_from_extracted_directory(tmp_path):
+    course = build_course(tmp_path / 'res')
+    imscc_path = export(course, tmp_path / 'course.imscc')
+    extracted = tmp_path / 'extracted'
+    with zipfile.ZipFile(imscc_path) as zf:
+        zf.extractall(extracted)
+        template_from_imscc.create_template_from_zip(zf, tmp_path / 'from_zip' / 'template')
+
+    template_from_imscc.create_template_structure(extracted, tmp_path / 'from_dir' / 'template')
+
+    def tree(root):
+        return {path.relative_to(root).as_posix(): path.read_bytes()
+                for path in root.rglob('*') if path.is_file()}
+
+    assert tree(tmp_path / 'from_dir') == tree(tmp_path / 'from_zip')
@@ -0,0 +1,108 @@
+"""Tests for quiz question rendering."""
+
+from imscc.quiz import (
+    Quiz, MatchingQuestion, MultipleChoiceQuestion, MultipleAnswersQuestion,
+    TrueFalseQuestion,
+)
+
+
+def test_question_edits_after_render_are_exported():
+    question = TrueFalseQuestion('<p>Old question</p>', True)
+    quiz = Quiz(title='Quiz').add_question(question)
+    first = quiz.to_qti_xml()
+    assert 'Old question' in first
+    
+    question.question_text = '<p>New question</p>'
+    question.correct_answer = False
+    question.points_possible = 3.0
+    second = quiz.to_qti_xml()
+    
+    assert 'Old question' not in second
+    assert 'New question' in second
+    assert f'respident="response1">{question.false_id}</varequal>' in second
+    assert '<fieldentry>3.0</fieldentry>' in second
+
+
+def test_qti_bytes_match_to_qti_xml():
+    question = MultipleChoiceQuestion('Pick one', [
+        {'text': 'a', 'correct': True},
+        {'text': 'b'},
+    ])
+    quiz = Quiz(title='Quiz').add_question(question)
+    assert question.qti_bytes.decode('utf-8') in quiz.to_qti_xml()
+
+
+def test_multiple_choice_answers_edited_after_init_are_exported():
+    question = MultipleChoiceQuestion('Pick one', [
+        {'text': 'a', 'correct': True},
+        {'text': 'b'},
+    ])
+    question.answers.append({'text': 'added later'})
+    question.answers[1]['text'] = 'b edited'
+    xml = question.qti_bytes.decode('utf-8')
+    
+    assert 'added later' in xml
+    assert 'b edited' in xml
+    assert 'id' in question.answers[2]
+    assert ','.join(a['id'] for a in question.answers) in xml
+
+
+def test_multiple_answers_edited_after_init_are_exported():
+    question = MultipleAnswersQuestion('Pick some', [
+        {'text': 'a', 'correct': True},
+        {'text': 'b'},
+    ])
+    question.answers[1]['correct'] = True
+    question.answers.append({'text': 'c'})
+    xml = question.qti_bytes.decode('utf-8')
+    
+    assert '<fieldentry>0,1,2</fieldentry>' in xml
+    assert 'respident="response1">1</varequal>' in xml
+    assert '>c</mattext>' in xml
+
+
+def test_multiple_choice_correct_answer_changed_after_init():
+    question = MultipleChoiceQuestion('Pick one', [
+        {'text': 'a', 'correct': True},
+        {'text': 'b'},
+    ])
+    question.answers[0]['correct'] = False
+    question.answers[1]['correct'] = True
+    xml = question.qti_bytes.decode('utf-8')
+    
+    assert f'respident="response1">{question.answers[1]["id"]}</varequal>' in xml
+    assert f'respident="response1">{question.answers[0]["id"]}</varequal>' not in xml
+
+
+def test_matching_groups_do_not_share_label_elements():
+    question = MatchingQuestion('Match', [
+        {'prompt': 'Stack', 'answer': 'LIFO'},
+        {'prompt': 'Queue', 'answer': 'FIFO'},
+    ])
+    item = question.to_qti_item()
+    groups = item.findall('presentation/response_grp')
+    first = groups[0].findall('render_choice/response_label')
+    second = groups[1].findall('render_choice/response_label')
+    
+    assert [label.get('ident') for label in first] == [label.get('ident') for label in second]
+    assert not {id(label) for label in first} & {id(label) for label in second}
+
+
+def test_questions_accept_ad_hoc_attributes():
+    question = TrueFalseQuestion('T?', True)
+    question.custom = 1
+    assert question.custom == 1
+
+
+def test_true_false_subclass_overriding_to_qti_item_is_exported():
+    class CustomTrueFalse(TrueFalseQuestion):
+        def to_qti_item(self):
+            item = super().to_qti_item()
+            item.set('title', 'Custom')
+            return item
+    
+    question = CustomTrueFalse('T?', True)
+    quiz = Quiz(title='Quiz').add_question(question)
+    
+    assert b'title="Custom"' in question.qti_bytes
+    assert 'title="Custom"' in quiz.to_qti_xml()